@@ -1,63 +1,306 @@
+import html
 import os
+import sys
+import threading
+import time
+from itertools import chain
+from PySide6.QtCore import Qt, QFileSystemWatcher, QThread, QTimer, Signal
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QVBoxLayout, QWidget,
+    QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
     QPushButton, QFileDialog, QLineEdit, QTextEdit, QMessageBox,
-    QProgressBar, QTableWidget, QTableWidgetItem
+    QProgressBar, QTableView, QCheckBox, QDialog, QAbstractItemView, QTableWidget, QTableWidgetItem
 )
-from docx import Document
-
-# Função para obter a lista de arquivos .docx em uma pasta ordenado pelo nome
-def obter_arquivos_docx(pasta):
-    arquivos = []
-    for arquivo in os.listdir(pasta):
-        if arquivo.endswith(".docx"):
-            arquivos.append(arquivo)
-    arquivos.sort()  # Ordena os arquivos pelo nome
-    return arquivos
-
-# Função para buscar uma palavra em um arquivo .docx
-def buscar_palavra_em_docx(arquivo, palavra):
-    try:
-        doc = Document(arquivo)
-    except Exception as e:
-        print(f"Erro ao abrir {arquivo}: {e}")
-        return False
-    for paragrafo in doc.paragraphs:
-        if palavra.lower() in paragrafo.text.lower():
-            return True
-    return False
-
-# Função para buscar uma palavra na lista de arquivos .docx
-def buscar_palavra_nos_arquivos(pasta, arquivos, palavra, progress_callback=None):
-    arquivos_encontrados = []
-    total_arquivos = len(arquivos)
-    
-    for index, arquivo in enumerate(arquivos):
-        if buscar_palavra_em_docx(os.path.join(pasta, arquivo), palavra):
-            arquivos_encontrados.append(arquivo)
-        
-        # Atualiza a barra de progresso se o callback foi fornecido
-        if progress_callback:
-            progress_callback(index + 1, total_arquivos)
-
-    return arquivos_encontrados
-
-# Função para criar um dicionário de uma lista de arquivos .docx
-def criar_dicionario_arquivos(arquivos):
-    dicionario = {}
-    for arquivo in arquivos:
+import perfil
+from busca import percorrer_docx
+from metadados import CatalogoArquivos
+from monitoramento import assinatura_subpasta
+from modelo_resultados import ModeloResultados, ProxyResultados
+from quarentena import Quarentena
+from resultados import COLUNAS_FIXAS
+
+# Intervalo mínimo (em segundos) entre os lotes de arquivos encontrados enviados à tabela
+INTERVALO_LOTE_TABELA = 0.2
+# Busca enquanto digita: espera (em milissegundos) depois da última tecla antes de buscar,
+# e tamanho mínimo do texto para buscar
+ESPERA_DIGITACAO = 250
+MINIMO_CARACTERES_DIGITACAO = 3
+# Quantidade de resultados anteriores guardados para refinar a busca enquanto digita
+LIMITE_RESULTADOS_DIGITACAO = 32
+# Monitoramento da pasta: espera (em milissegundos) depois do último aviso de mudança, para
+# não ler um arquivo que ainda está sendo copiado ou gravado
+ESPERA_MONITORAMENTO = 2000
+
+# Thread que executa uma busca fora da interface, avisando por sinal, em lotes, os arquivos
+# encontrados junto com os índices dos termos que cada um contém. Sem lista de arquivos, busca na pasta
+# inteira, incluindo as subpastas (atualizando o índice antes); com a lista, busca só nesses arquivos, como na
+# segunda busca. Vários termos são procurados com uma única leitura de cada documento.
+class ThreadBusca(QThread):
+    progresso = Signal(int, int)
+    arquivos_encontrados = Signal(list)  # Lote de (arquivo, índices dos termos presentes)
+    mensagem = Signal(str)
+    erros = Signal(list)  # (arquivo, tipo do erro, motivo) dos arquivos que não foram lidos
+    concluida = Signal(bool)  # True quando a busca foi cancelada
+
+    def __init__(self, pasta, termos, catalogo, quarentena, arquivos=None, parent=None):
+        super().__init__(parent)
+        self.pasta = pasta
+        self.termos = termos
+        self.catalogo = catalogo
+        self.quarentena = quarentena
+        self.arquivos = arquivos
+        self.cancelamento = threading.Event()
+        self.ignorados = []  # (arquivo, tipo do erro, motivo) dos arquivos que a varredura não leu
+        self.lote = []  # Arquivos encontrados ainda não enviados à tabela
+        self.ultimo_envio = time.monotonic()
+
+    def cancelar(self):
+        self.cancelamento.set()
+
+    def run(self):
+        if self.arquivos is None:
+            # A pasta (com as subpastas) é listada aos poucos: a atualização do índice, ou a
+            # varredura sem índice, começa enquanto a listagem ainda anda
+            descobertos = []
+            fora_do_padrao = []
+
+            def descobrir():
+                for arquivo in percorrer_docx(self.pasta):
+                    descobertos.append(arquivo)
+                    # Os nomes entram no catálogo antes de o arquivo aparecer na tabela
+                    if self.catalogo.adicionar(arquivo):
+                        fora_do_padrao.append(arquivo)
+                    yield arquivo
+                self.catalogo.atualizar(descobertos)
+                self.avisar_fora_do_padrao(fora_do_padrao)
+
+            listagem = descobrir()
+            encontrados = self.buscar_no_indice(listagem)
+            # Com o índice, a listagem já terminou; sem ele, a varredura continua a listagem
+            arquivos = chain(list(descobertos), listagem)
+        else:
+            descobertos = self.arquivos
+            arquivos = self.arquivos
+            encontrados = self.buscar_no_indice(arquivos)
+        if self.cancelamento.is_set():
+            self.concluida.emit(True)
+            return
+
+        # Termos que o índice não responde são procurados juntos em uma varredura dos arquivos
+        # (ou do texto já em cache), avisando cada arquivo assim que ele termina
+        from consulta import varrer_consultas_nos_arquivos
+        pendentes = [indice for indice, conjunto in enumerate(encontrados) if conjunto is None]
+        if not pendentes:
+            for arquivo in arquivos:
+                self.avisar(arquivo, encontrados, [])
+        else:
+            resultados = varrer_consultas_nos_arquivos(
+                self.pasta, arquivos, [self.termos[indice] for indice in pendentes], catalogo=self.catalogo,
+                progress_callback=self.progresso.emit, cancelamento=self.cancelamento,
+                ignorado_callback=self.ignorar, quarentena=self.quarentena
+            )
+            varridos = set()
+            for arquivo, presenca in resultados:
+                varridos.add(arquivo)
+                self.avisar(arquivo, encontrados, [indice for indice, achou in zip(pendentes, presenca) if achou])
+            # Arquivos descartados antes da leitura (pelos filtros por campo ou pelos mapas de
+            # trigramas) ainda podem ter termos respondidos pelo índice
+            if not self.cancelamento.is_set():
+                for arquivo in descobertos:
+                    if arquivo not in varridos:
+                        self.avisar(arquivo, encontrados, [])
+
+        self.enviar_lote()
+        self.avisar_ignorados()
+        self.concluida.emit(self.cancelamento.is_set())
+
+    def ignorar(self, arquivo, erro):
+        self.ignorados.append((arquivo, erro.tipo, str(erro)))
+
+    def avisar_ignorados(self):
+        # Arquivos com erro, grandes demais ou em quarentena ficam fora dos resultados; a lista
+        # completa vai para o painel de erros
+        if self.ignorados:
+            self.mensagem.emit(f"{len(self.ignorados)} arquivo(s) não foram lidos; veja a lista em \"Erros\".")
+        self.erros.emit(self.ignorados)
+
+    def avisar_fora_do_padrao(self, fora_do_padrao):
+        # Os nomes dos arquivos são interpretados uma única vez por pasta; os que não seguem
+        # o padrão "Código - Empresa - Status.docx" ficam fora da tabela
+        if fora_do_padrao:
+            exemplos = ", ".join(fora_do_padrao[:5]) + (", ..." if len(fora_do_padrao) > 5 else "")
+            self.mensagem.emit(f"{len(fora_do_padrao)} arquivo(s) com nome fora do padrão "
+                               f"'Código - Empresa - Status.docx' não aparecem na tabela: {exemplos}")
+
+    def avisar(self, arquivo, encontrados, termos_varridos):
+        termos_presentes = sorted(termos_varridos + [
+            indice for indice, conjunto in enumerate(encontrados) if conjunto and arquivo in conjunto
+        ])
+        if termos_presentes:
+            self.lote.append((arquivo, termos_presentes))
+            if time.monotonic() - self.ultimo_envio >= INTERVALO_LOTE_TABELA:
+                self.enviar_lote()
+
+    # Cada sinal atualiza a tabela; um sinal por arquivo deixava a interface lenta quando
+    # muitos arquivos terminam juntos (texto em cache ou descartados pelos mapas)
+    def enviar_lote(self):
+        if self.lote:
+            self.arquivos_encontrados.emit(self.lote)
+            self.lote = []
+        self.ultimo_envio = time.monotonic()
+
+    def buscar_no_indice(self, arquivos):
+        # Retorna, para cada termo, o conjunto de arquivos que o contém (None se o índice não responde).
+        # A conexão com o índice é aberta na própria thread, pois o SQLite não a compartilha.
+        # O índice só é importado aqui, já com a janela aberta, para não atrasar a inicialização.
+        # Na segunda busca, as consultas avançadas são avaliadas só nos arquivos da primeira.
+        import sqlite3
+        from consulta import buscar_consulta_no_indice
+        from indice import IndicePalavras
+        sem_indice = [None] * len(self.termos)
+        try:
+            indice = IndicePalavras(self.pasta)
+        except sqlite3.Error as e:
+            # Pasta sem permissão de escrita, por exemplo: segue com a varredura completa
+            self.mensagem.emit(f"Não foi possível usar o índice da pasta: {e}")
+            return sem_indice
         try:
-            codigo_str, empresa, status = arquivo.split("-")
-            codigo = codigo_str.strip()
-            dicionario[arquivo] = {
-                "Código": codigo,
-                "Empresa": empresa.strip(),
-                "Status": status.strip().replace(".docx", "")
-            }
-        except ValueError:
-            # Caso o nome do arquivo não tenha o formato esperado ou a conversão falhe, exibe uma mensagem de erro
-            print(f"Formato inesperado ou erro ao converter o código no arquivo: {arquivo}")
-    return dicionario
+            self.atualizar_indice(indice, arquivos)
+            if self.cancelamento.is_set():
+                return sem_indice
+            with perfil.medir_etapa("indice_consulta"):
+                candidatos = set(self.arquivos) if self.arquivos is not None else None
+                return [buscar_consulta_no_indice(indice, termo, candidatos) for termo in self.termos]
+        except sqlite3.Error as e:
+            self.mensagem.emit(f"Não foi possível usar o índice da pasta: {e}")
+            return sem_indice
+        finally:
+            indice.fechar()
+
+    def atualizar_indice(self, indice, arquivos):
+        # Na busca na pasta inteira o índice é atualizado com a listagem; na segunda busca
+        # os arquivos são os da primeira, já atualizados
+        if self.arquivos is None:
+            with perfil.medir_etapa("indice_atualizacao"):
+                indice.atualizar(arquivos, self.progresso.emit, cancelamento=self.cancelamento,
+                                 ignorado_callback=self.ignorar, quarentena=self.quarentena)
+
+
+# Thread do monitoramento da pasta: descobre os arquivos novos, alterados e apagados nas
+# subpastas avisadas, atualiza o índice só com eles e reavalia as consultas da tabela nesses
+# arquivos, sem percorrer a pasta inteira. Os arquivos alterados que contêm algum termo
+# saem pelo mesmo sinal da busca; os que não saem não contêm nenhum.
+class ThreadAtualizacao(ThreadBusca):
+    subpastas_novas = Signal(list)
+
+    def __init__(self, pasta, termos, catalogo, quarentena, subpastas, monitoradas, na_tabela, pendentes=(),
+                 parent=None):
+        super().__init__(pasta, termos, catalogo, quarentena, [], parent)
+        self.subpastas = subpastas
+        self.monitoradas = monitoradas
+        self.na_tabela = na_tabela  # Arquivos da tabela, para retirar os que sumiram
+        self.pendentes = pendentes  # Arquivos de atualizações canceladas, ainda fora da tabela
+        self.removidos = []
+
+    def run(self):
+        import sqlite3
+        from indice import IndicePalavras
+        from monitoramento import comparar_subpastas, juntar_pendentes
+        try:
+            # Somente leitura, para que a própria conferência não gere novos avisos na pasta
+            indice = IndicePalavras(self.pasta, somente_leitura=True)
+            try:
+                guardados = indice.estado_arquivos()
+            finally:
+                indice.fechar()
+        except sqlite3.Error as e:
+            # Sem o índice, todos os arquivos das subpastas avisadas são conferidos (o texto
+            # dos que não mudaram ainda está no cache)
+            self.mensagem.emit(f"Não foi possível usar o índice da pasta: {e}")
+            guardados = {}
+        alterados, removidos, novas = comparar_subpastas(self.pasta, self.subpastas, self.monitoradas, guardados)
+        self.subpastas_novas.emit(novas)
+        prefixos = tuple(self.subpastas)
+        sumidos = {arquivo for arquivo in self.na_tabela
+                   if arquivo.startswith(prefixos) and not os.path.exists(os.path.join(self.pasta, arquivo))}
+        self.arquivos, self.removidos = juntar_pendentes(self.pasta, alterados, sumidos.union(removidos),
+                                                         self.pendentes)
+        if not self.arquivos and not self.removidos:
+            # Avisos sem mudança em arquivos .docx (arquivos de trava do Word, por exemplo)
+            self.concluida.emit(False)
+            return
+
+        for arquivo in self.removidos:
+            if arquivo in self.catalogo.metadados:
+                self.catalogo.remover(arquivo)
+            self.catalogo.fora_do_padrao.discard(arquivo)
+        for arquivo in self.arquivos:
+            self.catalogo.adicionar(arquivo)
+        super().run()
+
+    def atualizar_indice(self, indice, arquivos):
+        with perfil.medir_etapa("indice_atualizacao"):
+            indice.atualizar(self.arquivos, self.progresso.emit, cancelamento=self.cancelamento,
+                             ignorado_callback=self.ignorar, quarentena=self.quarentena, removidos=self.removidos)
+
+
+# Janela com o relatório de desempenho da última busca medida, com opção de exportar em JSON
+class PainelDiagnostico(QDialog):
+    def __init__(self, perfil_busca, parent=None):
+        super().__init__(parent)
+        self.perfil_busca = perfil_busca
+        self.setWindowTitle("Diagnóstico da busca")
+        self.resize(600, 400)
+
+        layout = QVBoxLayout()
+        texto = QTextEdit(self)
+        texto.setReadOnly(True)
+        texto.setPlainText(perfil_busca.texto())
+        layout.addWidget(texto)
+
+        btn_exportar = QPushButton("Exportar JSON", self)
+        btn_exportar.clicked.connect(self.exportar)
+        layout.addWidget(btn_exportar)
+        self.setLayout(layout)
+
+    def exportar(self):
+        caminho, _ = QFileDialog.getSaveFileName(self, "Exportar relatório", "diagnostico.json", "JSON (*.json)")
+        if caminho:
+            try:
+                self.perfil_busca.exportar_json(caminho)
+            except OSError as e:
+                QMessageBox.warning(self, "Aviso", f"Não foi possível gravar o relatório: {e}")
+
+
+# Janela com os arquivos que a última busca não conseguiu ler, com o tipo do erro e o motivo.
+# Limpar a quarentena faz as próximas buscas tentarem ler de novo os arquivos que estão nela.
+class PainelErros(QDialog):
+    def __init__(self, erros, quarentena, parent=None):
+        super().__init__(parent)
+        self.quarentena = quarentena
+        self.setWindowTitle("Arquivos não lidos")
+        self.resize(700, 400)
+
+        layout = QVBoxLayout()
+        tabela = QTableWidget(len(erros), 3, self)
+        tabela.setHorizontalHeaderLabels(["Arquivo", "Erro", "Motivo"])
+        tabela.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        for linha, valores in enumerate(erros):
+            for coluna, valor in enumerate(valores):
+                tabela.setItem(linha, coluna, QTableWidgetItem(valor))
+        tabela.resizeColumnsToContents()
+        layout.addWidget(tabela)
+
+        self.btn_limpar_quarentena = QPushButton(f"Limpar quarentena ({len(quarentena)} arquivo(s))", self)
+        self.btn_limpar_quarentena.clicked.connect(self.limpar_quarentena)
+        self.btn_limpar_quarentena.setEnabled(len(quarentena) > 0)
+        layout.addWidget(self.btn_limpar_quarentena)
+        self.setLayout(layout)
+
+    def limpar_quarentena(self):
+        self.quarentena.limpar()
+        self.quarentena.salvar()
+        self.btn_limpar_quarentena.setText("Limpar quarentena (0 arquivo(s))")
+        self.btn_limpar_quarentena.setEnabled(False)
 
 
 # Classe principal da interface gráfica
@@ -73,16 +316,37 @@ class BuscaPalavrasApp(QMainWindow):
         self.btn_selecionar_pasta.clicked.connect(self.selecionar_pasta)
         layout.addWidget(self.btn_selecionar_pasta)
 
+        # Monitoramento da pasta: arquivos novos, alterados ou apagados atualizam a tabela
+        # sem uma nova busca
+        self.check_monitorar = QCheckBox("Monitorar a pasta", self)
+        self.check_monitorar.toggled.connect(self.definir_monitoramento)
+        layout.addWidget(self.check_monitorar)
+        self.monitor_pasta = QFileSystemWatcher(self)
+        self.monitor_pasta.directoryChanged.connect(self.pasta_alterada)
+        self.temporizador_monitoramento = QTimer(self)
+        self.temporizador_monitoramento.setSingleShot(True)
+        self.temporizador_monitoramento.setInterval(ESPERA_MONITORAMENTO)
+        self.temporizador_monitoramento.timeout.connect(self.atualizar_pasta_alterada)
+
         self.input_palavra1 = QLineEdit(self)
         self.input_palavra1.setPlaceholderText("Digite a primeira palavra para busca")
         layout.addWidget(self.input_palavra1)
 
+        # Busca enquanto digita: cada tecla cancela a busca em andamento e reinicia a espera
+        self.check_ao_digitar = QCheckBox("Buscar enquanto digita", self)
+        layout.addWidget(self.check_ao_digitar)
+        self.temporizador_digitacao = QTimer(self)
+        self.temporizador_digitacao.setSingleShot(True)
+        self.temporizador_digitacao.setInterval(ESPERA_DIGITACAO)
+        self.temporizador_digitacao.timeout.connect(self.buscar_ao_digitar)
+        self.input_palavra1.textChanged.connect(self.texto_digitado)
+
         self.btn_buscar1 = QPushButton("Buscar Primeira Palavra", self)
         self.btn_buscar1.clicked.connect(self.iniciar_primeira_busca)
         layout.addWidget(self.btn_buscar1)
 
         self.input_palavra2 = QLineEdit(self)
-        self.input_palavra2.setPlaceholderText("Digite a segunda palavra para busca (opcional)")
+        self.input_palavra2.setPlaceholderText("Digite a segunda palavra para busca (opcional; várias separadas por ;)")
         layout.addWidget(self.input_palavra2)
 
         self.btn_buscar2 = QPushButton("Buscar Segunda Palavra", self)
@@ -90,6 +354,11 @@ class BuscaPalavrasApp(QMainWindow):
         self.btn_buscar2.setEnabled(False)
         layout.addWidget(self.btn_buscar2)
 
+        self.btn_cancelar = QPushButton("Cancelar", self)
+        self.btn_cancelar.clicked.connect(self.cancelar_busca)
+        self.btn_cancelar.setEnabled(False)
+        layout.addWidget(self.btn_cancelar)
+
         self.resultado_busca = QTextEdit(self)
         self.resultado_busca.setReadOnly(True)
         layout.addWidget(self.resultado_busca)
@@ -98,33 +367,96 @@ class BuscaPalavrasApp(QMainWindow):
         self.progress_bar.setValue(0)
         layout.addWidget(self.progress_bar)
 
-        # Adicionando o widget para a tabela
-        self.tabela_resultados = QTableWidget(self)
-        self.tabela_resultados.setColumnCount(3)
-        self.tabela_resultados.setHorizontalHeaderLabels(["Código", "Empresa", "Status"])
+        # Filtro das linhas da tabela por código, empresa ou status
+        self.input_filtro = QLineEdit(self)
+        self.input_filtro.setPlaceholderText("Filtrar resultados (código, empresa ou status)")
+        layout.addWidget(self.input_filtro)
+
+        # Tabela de resultados: a view só desenha as linhas visíveis, lidas do modelo;
+        # a ordenação e o filtro passam pelo proxy
+        self.modelo_resultados = ModeloResultados(self)
+        self.proxy_resultados = ProxyResultados(self)
+        self.proxy_resultados.setSourceModel(self.modelo_resultados)
+        self.input_filtro.textChanged.connect(self.proxy_resultados.definir_filtro)
+        self.tabela_resultados = QTableView(self)
+        self.tabela_resultados.setModel(self.proxy_resultados)
+        self.tabela_resultados.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tabela_resultados.setSortingEnabled(True)
+        self.tabela_resultados.selectionModel().currentRowChanged.connect(
+            lambda atual, anterior: self.mostrar_trechos()
+        )
         layout.addWidget(self.tabela_resultados)
 
+        # Trechos do arquivo selecionado na tabela, com os termos buscados destacados
+        self.visualizador_trechos = QTextEdit(self)
+        self.visualizador_trechos.setReadOnly(True)
+        self.visualizador_trechos.setPlaceholderText("Selecione um arquivo na tabela para ver onde os termos aparecem")
+        layout.addWidget(self.visualizador_trechos)
+
         self.btn_nova_pesquisa = QPushButton("Nova Pesquisa", self)
         self.btn_nova_pesquisa.clicked.connect(self.limpar_pesquisa)
         layout.addWidget(self.btn_nova_pesquisa)
 
+        # A tabela pode ser gravada em uma sessão e aberta depois sem refazer a busca, ou
+        # exportada em CSV ou .xlsx
+        layout_sessao = QHBoxLayout()
+        self.btn_salvar_sessao = QPushButton("Salvar sessão", self)
+        self.btn_salvar_sessao.clicked.connect(self.salvar_sessao)
+        layout_sessao.addWidget(self.btn_salvar_sessao)
+        self.btn_abrir_sessao = QPushButton("Abrir sessão", self)
+        self.btn_abrir_sessao.clicked.connect(self.abrir_sessao)
+        layout_sessao.addWidget(self.btn_abrir_sessao)
+        self.btn_exportar = QPushButton("Exportar", self)
+        self.btn_exportar.clicked.connect(self.exportar_resultados)
+        layout_sessao.addWidget(self.btn_exportar)
+        layout.addLayout(layout_sessao)
+
+        # Medição de desempenho opcional: tempos por etapa, arquivos mais lentos e falhas
+        layout_diagnostico = QHBoxLayout()
+        self.check_medir = QCheckBox("Medir desempenho da busca", self)
+        layout_diagnostico.addWidget(self.check_medir)
+        self.btn_diagnostico = QPushButton("Diagnóstico", self)
+        self.btn_diagnostico.clicked.connect(self.mostrar_diagnostico)
+        self.btn_diagnostico.setEnabled(False)
+        layout_diagnostico.addWidget(self.btn_diagnostico)
+        self.btn_erros = QPushButton("Erros", self)
+        self.btn_erros.clicked.connect(self.mostrar_erros)
+        self.btn_erros.setEnabled(False)
+        layout_diagnostico.addWidget(self.btn_erros)
+        layout.addLayout(layout_diagnostico)
+
         container = QWidget()
         container.setLayout(layout)
         self.setCentralWidget(container)
 
         self.pasta = ""
+        self.catalogo = CatalogoArquivos()  # Código, empresa e status de cada arquivo da pasta
+        self.thread_busca = None  # Busca em andamento, se houver
+        self.busca_ao_digitar_em_andamento = False  # A busca em andamento foi iniciada pela digitação
+        self.busca_ao_digitar_pendente = False  # Texto mudou enquanto a busca anterior era cancelada
+        self.resultados_digitacao = {}  # Consulta simples normalizada -> arquivos encontrados
+        self.subpastas_alteradas = set()  # Subpastas monitoradas com mudanças ainda não conferidas
+        self.arquivos_pendentes = set()  # Arquivos de atualizações canceladas, a levar para a tabela
+        self.assinaturas = {}  # Caminho de cada pasta monitorada -> assinatura_subpasta
+        self.perfil_busca = None  # Medição da última busca, quando ativada
+        self.quarentena = Quarentena()  # Arquivos com erro, pulados até serem modificados
+        self.erros_busca = []  # Arquivos que a última busca não leu
         self.arquivos_primeira_busca = []
         self.arquivos_segunda_busca = []
+        self.termos_buscados = []  # Termos da primeira e das segundas buscas, destacados nos trechos
         self.colunas_adicionais = 0  # Contador para as colunas adicionais de buscas subsequentes
 
     def selecionar_pasta(self):
         self.pasta = QFileDialog.getExistingDirectory(self, "Selecionar Pasta")
         if self.pasta:
+            self.catalogo = CatalogoArquivos()
+            self.resultados_digitacao.clear()
             self.resultado_busca.setText(f"Pasta selecionada: {self.pasta}\n")
             self.arquivos_primeira_busca = []
             self.arquivos_segunda_busca = []
             self.btn_buscar2.setEnabled(False)
             self.input_palavra2.clear()
+            self.definir_monitoramento(self.check_monitorar.isChecked())
 
     def iniciar_primeira_busca(self):
         if not self.pasta:
@@ -134,106 +466,460 @@ class BuscaPalavrasApp(QMainWindow):
         if not palavra1:
             QMessageBox.warning(self, "Aviso", "Por favor, insira a primeira palavra para busca.")
             return
+        if not self.validar_consultas([palavra1]):
+            return
 
         self.resultado_busca.append(f"\nBuscando a palavra '{palavra1}'...\n")
-        QApplication.setOverrideCursor(Qt.WaitCursor)
-        QApplication.processEvents()
-
-        arquivos = obter_arquivos_docx(self.pasta)
-        self.progress_bar.setMaximum(len(arquivos))
-        self.arquivos_primeira_busca = buscar_palavra_nos_arquivos(
-            self.pasta, arquivos, palavra1, self.atualizar_progresso
-        )
-
-        dicionario_arquivos = criar_dicionario_arquivos(self.arquivos_primeira_busca)
+        # A busca pelo botão percorre a pasta de novo; os resultados guardados da digitação
+        # podem não ter os arquivos novos. Uma busca da digitação à espera já é esta.
+        self.resultados_digitacao.clear()
+        self.temporizador_digitacao.stop()
+        self.busca_ao_digitar_pendente = False
+        self.buscar_primeira_palavra(palavra1)
+
+    def buscar_primeira_palavra(self, palavra1, arquivos=None, ao_digitar=False):
+        # Uma nova primeira busca descarta as linhas e colunas das buscas anteriores
+        self.arquivos_primeira_busca = []
+        self.termos_buscados = [palavra1]
+        self.visualizador_trechos.clear()
+        self.modelo_resultados.limpar()
+        self.colunas_adicionais = 0
+
+        # Com a lista de arquivos, a busca fica restrita a eles (refinamento enquanto digita)
+        thread = ThreadBusca(self.pasta, [palavra1], self.catalogo, self.quarentena, arquivos, parent=self)
+        thread.arquivos_encontrados.connect(self.adicionar_linhas)
+        thread.concluida.connect(lambda cancelada: self.concluir_primeira_busca(palavra1, cancelada, ao_digitar))
+        self.busca_ao_digitar_em_andamento = ao_digitar
+        self.executar_busca(thread)
+
+    def texto_digitado(self):
+        if not self.check_ao_digitar.isChecked():
+            return
+        # O resultado da busca em andamento já não vale para o texto novo; uma atualização do
+        # monitoramento é retomada depois
+        if self.thread_busca and (self.busca_ao_digitar_em_andamento or isinstance(self.thread_busca, ThreadAtualizacao)):
+            self.cancelar_busca()
+        self.temporizador_digitacao.start()
 
-        QApplication.restoreOverrideCursor()
+    def buscar_ao_digitar(self):
+        palavra1 = self.input_palavra1.text().strip()
+        if not self.pasta or len(palavra1) < MINIMO_CARACTERES_DIGITACAO:
+            return
+        if self.thread_busca:
+            # A nova busca começa quando a em andamento terminar: a da digitação anterior e a
+            # atualização do monitoramento estão sendo canceladas, e a do botão não é interrompida
+            self.busca_ao_digitar_pendente = True
+            return
+        from consulta import ErroConsulta, eh_consulta_avancada, validar_consultas
+        try:
+            validar_consultas([palavra1])
+        except ErroConsulta:
+            return  # Consulta ainda incompleta (aspas ou parênteses abertos, por exemplo)
+
+        # Um trecho simples que contém um trecho já buscado só pode estar nos arquivos em que
+        # aquele foi encontrado: a busca é refeita só nesses arquivos, e não na pasta inteira
+        arquivos = None
+        if not eh_consulta_avancada(palavra1):
+            from normalizacao import normalizar
+            consulta = normalizar(palavra1)
+            anteriores = [encontrados for anterior, encontrados in self.resultados_digitacao.items() if anterior in consulta]
+            if anteriores:
+                arquivos = min(anteriores, key=len)
+        self.buscar_primeira_palavra(palavra1, arquivos, ao_digitar=True)
+
+    def guardar_resultado_digitacao(self, palavra1):
+        from consulta import eh_consulta_avancada
+        if eh_consulta_avancada(palavra1):
+            return
+        from normalizacao import normalizar
+        if len(self.resultados_digitacao) >= LIMITE_RESULTADOS_DIGITACAO:
+            self.resultados_digitacao.pop(next(iter(self.resultados_digitacao)))
+        self.resultados_digitacao[normalizar(palavra1)] = list(self.arquivos_primeira_busca)
+
+    def adicionar_linhas(self, encontrados):
+        # Chamado a cada lote de arquivos encontrados, para as linhas aparecerem durante a busca
+        with perfil.medir_etapa("tabela"):
+            lote = []
+            for arquivo, termos_presentes in encontrados:
+                self.arquivos_primeira_busca.append(arquivo)
+                dados = self.catalogo.dados(arquivo)
+                if dados:
+                    # Preenche as colunas Código, Empresa e Status
+                    lote.append((arquivo, dados))
+            self.modelo_resultados.adicionar_arquivos(lote)
+
+    def concluir_primeira_busca(self, palavra1, cancelada, ao_digitar=False):
+        # A varredura entrega os arquivos na ordem em que terminam; volta à ordem dos nomes
+        self.arquivos_primeira_busca.sort()
+        self.tabela_resultados.sortByColumn(0, Qt.AscendingOrder)
+        if not cancelada:
+            self.guardar_resultado_digitacao(palavra1)
+        if ao_digitar:
+            # Enquanto digita, só a busca mais recente interessa; o resumo vai para a barra de status
+            self.btn_buscar2.setEnabled(bool(self.arquivos_primeira_busca))
+            if not cancelada:
+                self.statusBar().showMessage(f"'{palavra1}': {len(self.arquivos_primeira_busca)} arquivo(s).")
+            return
 
+        if cancelada:
+            self.resultado_busca.append(f"Busca pela palavra '{palavra1}' cancelada.")
         if self.arquivos_primeira_busca:
-            self.resultado_busca.append(f"A palavra '{palavra1}' foi encontrada nos seguintes arquivos:")
-
-            self.tabela_resultados.setRowCount(len(dicionario_arquivos))
-            for row, dados in enumerate(dicionario_arquivos.values()):
-                # Preenche as colunas Código, Empresa e Status
-                self.tabela_resultados.setItem(row, 0, QTableWidgetItem(dados['Código']))
-                self.tabela_resultados.setItem(row, 1, QTableWidgetItem(dados['Empresa']))
-                self.tabela_resultados.setItem(row, 2, QTableWidgetItem(dados['Status']))
-
-                # Torna as células não editáveis
-                for col in range(3):
-                    item = self.tabela_resultados.item(row, col)
-                    item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-
-            self.resultado_busca.append("")  
+            self.resultado_busca.append(
+                f"A palavra '{palavra1}' foi encontrada em {len(self.arquivos_primeira_busca)} arquivo(s)."
+            )
+            self.resultado_busca.append("")
             self.btn_buscar2.setEnabled(True)
         else:
             self.resultado_busca.append(f"Nenhum arquivo contém a palavra '{palavra1}'.")
             self.btn_buscar2.setEnabled(False)
 
-        self.progress_bar.setValue(0)
-
     def iniciar_segunda_busca(self):
         if not self.arquivos_primeira_busca:
             QMessageBox.warning(self, "Aviso", "Nenhum arquivo encontrado na primeira busca.")
             return
-        palavra2 = self.input_palavra2.text().strip()
-        if not palavra2:
+        # Vários termos separados por ";" viram várias colunas, preenchidas com uma única leitura
+        termos = [termo.strip() for termo in self.input_palavra2.text().split(";") if termo.strip()]
+        if not termos:
             QMessageBox.warning(self, "Aviso", "Por favor, insira a segunda palavra para busca.")
             return
+        if not self.validar_consultas(termos):
+            return
+        descricao = "', '".join(termos)
+        self.termos_buscados += termos
 
-        self.resultado_busca.append(f"\nBuscando a palavra '{palavra2}' nos arquivos filtrados...\n")
-        QApplication.setOverrideCursor(Qt.WaitCursor)
-        QApplication.processEvents()
+        self.resultado_busca.append(f"\nBuscando '{descricao}' nos arquivos filtrados...\n")
 
-        # Adicionar nova coluna para a palavra buscada
-        self.colunas_adicionais += 1
-        nova_coluna_index = self.tabela_resultados.columnCount()
-        self.tabela_resultados.setColumnCount(nova_coluna_index + 1)
-        self.tabela_resultados.setHorizontalHeaderItem(nova_coluna_index, QTableWidgetItem(palavra2))
+        # Adicionar uma nova coluna para cada termo buscado, começando com "Não" em todas as linhas
+        primeira_coluna = self.modelo_resultados.adicionar_termos(termos)
+        self.colunas_adicionais += len(termos)
 
-        # Realiza a segunda busca
-        self.progress_bar.setMaximum(len(self.arquivos_primeira_busca))
-        for row, arquivo in enumerate(self.arquivos_primeira_busca):
-            encontrado = buscar_palavra_em_docx(os.path.join(self.pasta, arquivo), palavra2)
-            resultado = "Sim" if encontrado else "Não"
-            item = QTableWidgetItem(resultado)
+        thread = ThreadBusca(
+            self.pasta, termos, self.catalogo, self.quarentena, list(self.arquivos_primeira_busca), parent=self
+        )
+        thread.arquivos_encontrados.connect(lambda encontrados: self.marcar_encontrados(encontrados, primeira_coluna))
+        thread.concluida.connect(lambda cancelada: self.concluir_segunda_busca(descricao, primeira_coluna, cancelada))
+        self.executar_busca(thread)
+
+    def mostrar_trechos(self):
+        # Os trechos só são montados para o arquivo selecionado, quando ele é selecionado,
+        # para que a busca em si continue só respondendo se cada arquivo tem os termos
+        indice = self.tabela_resultados.currentIndex()
+        if not indice.isValid() or not self.termos_buscados:
+            self.visualizador_trechos.clear()
+            return
+        arquivo = indice.data(Qt.UserRole)
+        from trechos import montar_trechos, trechos_em_html
+        try:
+            with perfil.medir_etapa("trechos"):
+                paragrafos, trechos = montar_trechos(self.pasta, arquivo, self.termos_buscados)
+        except Exception as e:
+            self.visualizador_trechos.setPlainText(f"Não foi possível ler {arquivo}: {e}")
+            return
+        if trechos:
+            self.visualizador_trechos.setHtml(f"<p><b>{html.escape(arquivo)}</b></p>" + trechos_em_html(paragrafos, trechos))
+        else:
+            self.visualizador_trechos.setPlainText(f"Nenhum trecho de {arquivo} contém os termos buscados.")
 
-            # Torna a nova célula da segunda busca não editável
-            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            self.tabela_resultados.setItem(row, nova_coluna_index, item)
+    def marcar_encontrados(self, encontrados, primeira_coluna):
+        with perfil.medir_etapa("tabela"):
+            self.modelo_resultados.marcar_varios([
+                (arquivo, primeira_coluna + indice) for arquivo, termos_presentes in encontrados for indice in termos_presentes
+            ])
 
-        QApplication.restoreOverrideCursor()
-        self.resultado_busca.append(f"Busca pela palavra '{palavra2}' concluída.\n")
-        self.progress_bar.setValue(0)
+    def concluir_segunda_busca(self, descricao, nova_coluna_index, cancelada):
+        if cancelada:
+            self.resultado_busca.append(f"Busca por '{descricao}' cancelada; as colunas estão incompletas.\n")
+        else:
+            self.resultado_busca.append(f"Busca por '{descricao}' concluída.\n")
 
-        # Ordenar a tabela com base na nova coluna
+        # Ordenar a tabela com base na primeira coluna nova
         self.ordenar_tabela_por_coluna(nova_coluna_index)
 
+    def validar_consultas(self, termos):
+        # Confere a sintaxe das consultas (AND, OR, NOT, NEAR/n, aspas, parênteses) antes da busca
+        from consulta import ErroConsulta, validar_consultas
+        try:
+            validar_consultas(termos)
+        except ErroConsulta as e:
+            QMessageBox.warning(self, "Aviso", f"Consulta inválida: {e}")
+            return False
+        return True
+
+    def executar_busca(self, thread):
+        # Inicia a thread de busca, bloqueando os botões até ela terminar
+        if self.check_medir.isChecked():
+            self.perfil_busca = perfil.ativar()
+        else:
+            perfil.desativar()
+        self.thread_busca = thread
+        thread.progresso.connect(self.atualizar_progresso)
+        thread.mensagem.connect(self.resultado_busca.append)
+        thread.erros.connect(self.registrar_erros)
+        thread.finished.connect(self.finalizar_busca)
+        self.definir_busca_em_andamento(True)
+        thread.start()
+
+    def cancelar_busca(self):
+        if self.thread_busca:
+            self.btn_cancelar.setEnabled(False)
+            self.thread_busca.cancelar()
+
+    def finalizar_busca(self):
+        self.thread_busca.deleteLater()
+        self.thread_busca = None
+        self.definir_busca_em_andamento(False)
+        self.progress_bar.setValue(0)
+        if perfil.esta_ativo():
+            perfil.desativar()
+            self.btn_diagnostico.setEnabled(True)
+        if self.busca_ao_digitar_pendente:
+            self.busca_ao_digitar_pendente = False
+            self.buscar_ao_digitar()
+        # Mudanças na pasta avisadas durante a busca
+        if self.thread_busca is None and self.subpastas_alteradas:
+            self.temporizador_monitoramento.start()
+
+    def mostrar_diagnostico(self):
+        if self.perfil_busca:
+            PainelDiagnostico(self.perfil_busca, self).exec()
+
+    def registrar_erros(self, erros):
+        self.erros_busca = erros
+        self.btn_erros.setText(f"Erros ({len(erros)})" if erros else "Erros")
+
+    def mostrar_erros(self):
+        PainelErros(self.erros_busca, self.quarentena, self).exec()
+
+    def definir_busca_em_andamento(self, em_andamento):
+        self.btn_cancelar.setEnabled(em_andamento)
+        self.btn_selecionar_pasta.setEnabled(not em_andamento)
+        self.btn_buscar1.setEnabled(not em_andamento)
+        self.btn_buscar2.setEnabled(not em_andamento and bool(self.arquivos_primeira_busca))
+        self.btn_nova_pesquisa.setEnabled(not em_andamento)
+        self.btn_salvar_sessao.setEnabled(not em_andamento)
+        self.btn_abrir_sessao.setEnabled(not em_andamento)
+        self.btn_exportar.setEnabled(not em_andamento)
+        # A quarentena é gravada pela busca; só pode ser limpa com a busca parada
+        self.btn_erros.setEnabled(not em_andamento and (bool(self.erros_busca) or len(self.quarentena) > 0))
+
     def ordenar_tabela_por_coluna(self, coluna):
-        # Ativa a ordenação na tabela e ordena pela coluna fornecida (onde foi feita a segunda busca)
-        self.tabela_resultados.sortItems(coluna, Qt.DescendingOrder)
+        # Ordena pela coluna fornecida (onde foi feita a segunda busca)
+        self.tabela_resultados.sortByColumn(coluna, Qt.DescendingOrder)
 
 
     def limpar_pesquisa(self):
+        self.resultados_digitacao.clear()
         self.arquivos_primeira_busca = []
         self.arquivos_segunda_busca = []
+        self.termos_buscados = []
+        self.visualizador_trechos.clear()
         self.input_palavra1.clear()
         self.input_palavra2.clear()
+        self.input_filtro.clear()
         self.resultado_busca.clear()
-        self.tabela_resultados.clearContents()
-        self.tabela_resultados.setColumnCount(3)
-        self.tabela_resultados.setHorizontalHeaderLabels(["Código", "Empresa", "Status"])
+        self.modelo_resultados.limpar()
         self.colunas_adicionais = 0  # Reiniciar contador de colunas adicionais
         self.btn_buscar2.setEnabled(False)
         self.resultado_busca.append("Pronto para uma nova pesquisa!\n")
         self.progress_bar.setValue(0)
 
+    def salvar_sessao(self):
+        if not self.termos_buscados:
+            QMessageBox.warning(self, "Aviso", "Não há resultados para salvar.")
+            return
+        from sessao import EXTENSAO_SESSAO, salvar_sessao
+        caminho, _ = QFileDialog.getSaveFileName(
+            self, "Salvar sessão", "resultados" + EXTENSAO_SESSAO, f"Sessão de busca (*{EXTENSAO_SESSAO})"
+        )
+        if not caminho:
+            return
+        import sqlite3
+        try:
+            salvar_sessao(caminho, self.pasta, self.termos_buscados, self.arquivos_primeira_busca,
+                          self.modelo_resultados.resultados)
+        except (OSError, sqlite3.Error) as e:
+            QMessageBox.warning(self, "Aviso", f"Não foi possível gravar a sessão: {e}")
+            return
+        self.resultado_busca.append(f"Sessão gravada em {caminho}.")
+
+    def abrir_sessao(self):
+        from sessao import EXTENSAO_SESSAO, ErroSessao, carregar_sessao
+        caminho, _ = QFileDialog.getOpenFileName(self, "Abrir sessão", "", f"Sessão de busca (*{EXTENSAO_SESSAO})")
+        if not caminho:
+            return
+        import sqlite3
+        try:
+            sessao = carregar_sessao(caminho)
+        except (OSError, sqlite3.Error, ErroSessao) as e:
+            QMessageBox.warning(self, "Aviso", f"Não foi possível abrir a sessão: {e}")
+            return
+
+        # A tabela volta como estava; a segunda busca continua sobre os arquivos da primeira
+        self.limpar_pesquisa()
+        self.pasta = sessao.pasta
+        self.catalogo = CatalogoArquivos()
+        for arquivo in sessao.arquivos_primeira_busca:
+            self.catalogo.adicionar(arquivo)
+        self.arquivos_primeira_busca = sessao.arquivos_primeira_busca
+        self.termos_buscados = sessao.termos_buscados
+        self.colunas_adicionais = len(sessao.resultados.termos)
+        self.modelo_resultados.carregar(sessao.resultados)
+        self.tabela_resultados.sortByColumn(0, Qt.AscendingOrder)
+        if self.termos_buscados:
+            # Sem disparar a busca enquanto digita, que trocaria a tabela da sessão
+            self.input_palavra1.blockSignals(True)
+            self.input_palavra1.setText(self.termos_buscados[0])
+            self.input_palavra1.blockSignals(False)
+        self.btn_buscar2.setEnabled(bool(self.arquivos_primeira_busca))
+
+        self.resultado_busca.setText(f"Sessão aberta: {caminho}\nPasta: {self.pasta}\n")
+        self.resultado_busca.append(f"{len(sessao.resultados)} arquivo(s) na tabela.")
+        if not os.path.isdir(self.pasta):
+            self.resultado_busca.append("A pasta da sessão não foi encontrada; os trechos e novas buscas não vão funcionar.")
+        self.definir_monitoramento(self.check_monitorar.isChecked())
+
+    def exportar_resultados(self):
+        if not len(self.modelo_resultados.resultados):
+            QMessageBox.warning(self, "Aviso", "Não há resultados para exportar.")
+            return
+        from exportacao import EXPORTADORES
+        caminho, _ = QFileDialog.getSaveFileName(
+            self, "Exportar resultados", "resultados.xlsx", "Planilha do Excel (*.xlsx);;CSV (*.csv)"
+        )
+        if not caminho:
+            return
+        exportar = EXPORTADORES.get(os.path.splitext(caminho)[1].lower())
+        if exportar is None:
+            QMessageBox.warning(self, "Aviso", "Escolha um arquivo .xlsx ou .csv.")
+            return
+        # Exporta as linhas na ordem e com o filtro da tela
+        try:
+            with perfil.medir_etapa("exportacao"):
+                exportar(caminho, self.modelo_resultados.resultados, self.proxy_resultados.linhas)
+        except OSError as e:
+            QMessageBox.warning(self, "Aviso", f"Não foi possível exportar os resultados: {e}")
+            return
+        self.resultado_busca.append(f"{len(self.proxy_resultados.linhas)} linha(s) exportada(s) para {caminho}.")
+
+    def definir_monitoramento(self, ativo):
+        diretorios = self.monitor_pasta.directories()
+        if diretorios:
+            self.monitor_pasta.removePaths(diretorios)
+        self.subpastas_alteradas = set()
+        self.arquivos_pendentes = set()
+        self.assinaturas = {}
+        if ativo and self.pasta and os.path.isdir(self.pasta):
+            self.monitor_pasta.addPath(self.pasta)
+            self.assinaturas[self.pasta] = assinatura_subpasta(self.pasta)
+            # A primeira conferência coloca as subpastas no monitoramento e atualiza os
+            # arquivos que mudaram desde a última busca
+            self.subpastas_alteradas.add("")
+            self.temporizador_monitoramento.start()
+
+    def subpasta_relativa(self, caminho):
+        relativo = os.path.relpath(caminho, self.pasta).replace(os.sep, "/")
+        return "" if relativo == "." else relativo + "/"
+
+    def pasta_alterada(self, caminho):
+        # Avisos em que nenhum .docx nem subpasta mudou (o índice e o diário do SQLite
+        # gravados pela própria busca, arquivos de trava do Word) são descartados
+        assinatura = assinatura_subpasta(caminho)
+        if assinatura == self.assinaturas.get(caminho):
+            return
+        self.assinaturas[caminho] = assinatura
+        # Os avisos chegam por pasta, às vezes vários por arquivo; são juntados até a
+        # pasta ficar parada por ESPERA_MONITORAMENTO
+        self.subpastas_alteradas.add(self.subpasta_relativa(caminho))
+        self.temporizador_monitoramento.start()
+
+    def monitorar_subpastas(self, subpastas):
+        caminhos = [os.path.join(self.pasta, subpasta.rstrip("/")) for subpasta in subpastas]
+        for caminho in caminhos:
+            self.assinaturas[caminho] = assinatura_subpasta(caminho)
+        if caminhos:
+            self.monitor_pasta.addPaths(caminhos)
+
+    def atualizar_pasta_alterada(self):
+        if not self.subpastas_alteradas or not self.check_monitorar.isChecked():
+            return
+        if self.thread_busca:
+            return  # Retomada quando a busca em andamento terminar
+        subpastas = self.subpastas_alteradas
+        self.subpastas_alteradas = set()
+        pendentes = self.arquivos_pendentes
+        self.arquivos_pendentes = set()
+        monitoradas = {self.subpasta_relativa(caminho) for caminho in self.monitor_pasta.directories()}
+
+        thread = ThreadAtualizacao(
+            self.pasta, list(self.termos_buscados), self.catalogo, self.quarentena, subpastas, monitoradas,
+            list(self.arquivos_primeira_busca), pendentes, parent=self
+        )
+        encontrados = {}  # Arquivo -> índices dos termos presentes
+        thread.arquivos_encontrados.connect(encontrados.update)
+        thread.subpastas_novas.connect(self.monitorar_subpastas)
+        thread.concluida.connect(lambda cancelada: self.concluir_atualizacao(thread, encontrados, cancelada))
+        self.busca_ao_digitar_em_andamento = False
+        self.executar_busca(thread)
+
+    def concluir_atualizacao(self, thread, encontrados, cancelada):
+        if cancelada:
+            # O índice pode já ter os arquivos alterados, e a nova conferência não os veria:
+            # eles vão direto para a próxima atualização
+            self.subpastas_alteradas.update(thread.subpastas)
+            self.arquivos_pendentes.update(thread.pendentes, thread.arquivos, thread.removidos)
+            return
+        if not self.termos_buscados or not (thread.arquivos or thread.removidos):
+            return
+
+        # Só os arquivos alterados mudam na tabela: entram os que passaram a conter o primeiro
+        # termo, saem os apagados e os que deixaram de contê-lo, e as colunas dos demais são refeitas
+        na_tabela = set(self.arquivos_primeira_busca)
+        saem = set(thread.removidos)
+        novos, marcas, desmarcas = [], [], []
+        for arquivo in thread.arquivos:
+            presentes = encontrados.get(arquivo, [])
+            if 0 not in presentes:
+                saem.add(arquivo)
+                continue
+            if arquivo not in na_tabela:
+                novos.append(arquivo)
+            for indice in range(1, len(thread.termos)):
+                coluna = len(COLUNAS_FIXAS) + indice - 1
+                (marcas if indice in presentes else desmarcas).append((arquivo, coluna))
+
+        with perfil.medir_etapa("tabela"):
+            self.modelo_resultados.remover_arquivos(saem & na_tabela)
+            self.modelo_resultados.adicionar_arquivos([
+                (arquivo, self.catalogo.dados(arquivo)) for arquivo in novos if self.catalogo.dados(arquivo)
+            ])
+            self.modelo_resultados.marcar_varios(marcas)
+            self.modelo_resultados.marcar_varios(desmarcas, encontrado=False)
+        self.arquivos_primeira_busca = sorted((na_tabela - saem).union(novos))
+        self.resultados_digitacao.clear()
+        self.resultado_busca.append(
+            f"Pasta alterada: {len(thread.arquivos)} arquivo(s) novo(s) ou modificado(s) e "
+            f"{len(thread.removidos)} apagado(s); {len(novos)} linha(s) nova(s) e "
+            f"{len(saem & na_tabela)} retirada(s) da tabela."
+        )
+
     def atualizar_progresso(self, valor, total):
+        # Total 0 (listagem da pasta ainda em andamento) deixa a barra em modo indeterminado
+        self.progress_bar.setMaximum(total)
         self.progress_bar.setValue(valor)
 
+    def closeEvent(self, event):
+        # Não fecha a janela com uma busca rodando em segundo plano
+        if self.thread_busca:
+            self.thread_busca.cancelar()
+            self.thread_busca.wait()
+        super().closeEvent(event)
+
 # Execução do aplicativo
 if __name__ == "__main__":
-    from PySide6.QtCore import Qt
+    if getattr(sys, "frozen", False):
+        # Necessário para os processos da busca no executável do Windows
+        import multiprocessing
+        multiprocessing.freeze_support()
     app = QApplication([])
     janela = BuscaPalavrasApp()
     janela.show()
@@ -0,0 +1,178 @@
+# Mede cada etapa da busca sobre uma pasta de arquivos .docx (de preferência um corpus gerado por
+# gerar_corpus.py) e grava os resultados em JSON, para comparar versões.
+# Uso: python benchmarks/bench_corpus.py PASTA [--gerar N] [--termo1 T] [--termo2 T ...]
+#          [--saida resultado.json] [--comparar anterior.json]
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PASTA_PROJETO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, PASTA_PROJETO)
+
+from busca import buscar_palavra_nos_arquivos, criar_dicionario_arquivos, obter_arquivos_docx
+from cache_texto import cache_textos
+from extrator import extrair_paragrafos_docx
+from gerar_corpus import gerar_corpus
+from indice import IndicePalavras
+from multitermos import buscar_termos_nos_arquivos
+
+
+# Função para medir o tempo de uma chamada, devolvendo (segundos, resultado)
+def medir(funcao, *argumentos, **opcoes):
+    inicio = time.perf_counter()
+    resultado = funcao(*argumentos, **opcoes)
+    return time.perf_counter() - inicio, resultado
+
+# Função para montar o resumo de uma etapa que processou uma quantidade de arquivos
+def resumo_etapa(segundos, quantidade, latencias=None):
+    resumo = {
+        "segundos": round(segundos, 4),
+        "arquivos": quantidade,
+        "arquivos_por_segundo": round(quantidade / segundos, 1) if segundos else None,
+    }
+    if latencias:
+        # Percentis da latência por arquivo, em milissegundos
+        quantis = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else latencias * 99
+        resumo["p50_ms"] = round(quantis[49] * 1000, 3)
+        resumo["p95_ms"] = round(quantis[94] * 1000, 3)
+    return resumo
+
+# Função para ler o pico de memória (RSS) do processo e dos processos filhos já encerrados, em KB
+def memoria_pico():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows: o módulo resource não existe
+    fator = 1024 if sys.platform == "darwin" else 1  # No macOS o valor vem em bytes
+    return {
+        "processo_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // fator,
+        "filhos_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // fator,
+    }
+
+# Função para medir o preenchimento da tabela da interface (modelo, proxy e view) com os arquivos
+# encontrados, seguido da ordenação pelo código, como no fim da primeira busca
+def medir_preenchimento_tabela(arquivos):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PySide6.QtCore import Qt
+        from PySide6.QtWidgets import QApplication, QTableView
+        from modelo_resultados import ModeloResultados, ProxyResultados
+    except ImportError as e:
+        return {"indisponivel": str(e)}
+
+    app = QApplication.instance() or QApplication([])
+    modelo = ModeloResultados()
+    proxy = ProxyResultados()
+    proxy.setSourceModel(modelo)
+    tabela = QTableView()
+    tabela.setModel(proxy)
+    inicio = time.perf_counter()
+    dicionario = criar_dicionario_arquivos(arquivos)
+    for arquivo, dados in dicionario.items():
+        modelo.adicionar_arquivo(arquivo, dados)
+    tabela.sortByColumn(0, Qt.AscendingOrder)
+    app.processEvents()
+    return resumo_etapa(time.perf_counter() - inicio, len(dicionario))
+
+# Função para identificar a versão do código medida (commit do git, se houver)
+def versao_codigo():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=PASTA_PROJETO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def executar(pasta, termo1, termos2):
+    etapas = {}
+
+    segundos, arquivos = medir(obter_arquivos_docx, pasta)
+    etapas["listagem"] = resumo_etapa(segundos, len(arquivos))
+
+    # Extração sequencial, para medir a latência de cada arquivo
+    latencias = []
+    inicio = time.perf_counter()
+    for arquivo in arquivos:
+        inicio_arquivo = time.perf_counter()
+        list(extrair_paragrafos_docx(os.path.join(pasta, arquivo)))
+        latencias.append(time.perf_counter() - inicio_arquivo)
+    etapas["extracao"] = resumo_etapa(time.perf_counter() - inicio, len(arquivos), latencias)
+
+    # Primeira busca com o cache de texto vazio (varredura paralela completa)
+    cache_textos.limpar()
+    segundos, encontrados = medir(buscar_palavra_nos_arquivos, pasta, arquivos, termo1)
+    etapas["primeira_busca"] = resumo_etapa(segundos, len(arquivos))
+    etapas["primeira_busca"]["encontrados"] = len(encontrados)
+
+    # Segunda busca (refinamento) sobre os arquivos encontrados, com o texto já em cache
+    segundos, matriz = medir(buscar_termos_nos_arquivos, pasta, encontrados, termos2)
+    etapas["segunda_busca"] = resumo_etapa(segundos, len(encontrados))
+    etapas["segunda_busca"]["termos"] = len(termos2)
+
+    # Índice em um arquivo temporário, para não gravar nada na pasta medida
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        indice = IndicePalavras(pasta, os.path.join(pasta_temporaria, "indice.sqlite"))
+        segundos, _ = medir(indice.atualizar, arquivos)
+        etapas["indice_construcao"] = resumo_etapa(segundos, len(arquivos))
+        segundos, _ = medir(indice.atualizar, arquivos)
+        etapas["indice_atualizacao_sem_mudancas"] = resumo_etapa(segundos, len(arquivos))
+        segundos, _ = medir(indice.buscar, termo1)
+        etapas["indice_consulta"] = {"segundos": round(segundos, 6)}
+        indice.fechar()
+
+    etapas["preenchimento_tabela"] = medir_preenchimento_tabela(encontrados)
+    return etapas
+
+# Função para mostrar a variação de tempo de cada etapa em relação a um resultado anterior
+def comparar(atual, anterior):
+    print(f"\nComparação com {anterior.get('versao')}:")
+    for etapa, dados in atual["etapas"].items():
+        antes = anterior.get("etapas", {}).get(etapa, {}).get("segundos")
+        agora = dados.get("segundos")
+        if antes and agora:
+            print(f"  {etapa:>32}: {antes:.4f}s -> {agora:.4f}s ({agora / antes:.2f}x)")
+
+def ler_argumentos(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark das etapas da busca em uma pasta de .docx.")
+    parser.add_argument("pasta")
+    parser.add_argument("--gerar", type=int, metavar="N",
+                        help="gera N arquivos sintéticos na pasta antes de medir")
+    parser.add_argument("--termo1", default="pavimento", help="termo da primeira busca")
+    parser.add_argument("--termo2", nargs="+", default=["solos moles", "não"], help="termos da segunda busca")
+    parser.add_argument("--saida", help="arquivo JSON para gravar os resultados (padrão: saída padrão)")
+    parser.add_argument("--comparar", help="arquivo JSON de uma execução anterior, para comparar")
+    return parser.parse_args(argumentos)
+
+def main():
+    args = ler_argumentos()
+    if args.gerar:
+        gerar_corpus(args.pasta, args.gerar)
+
+    resultado = {
+        "versao": versao_codigo(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "nucleos": os.cpu_count(),
+        "parametros": {"pasta": args.pasta, "termo1": args.termo1, "termo2": args.termo2},
+        "etapas": executar(args.pasta, args.termo1, args.termo2),
+        "memoria_pico": memoria_pico(),
+    }
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(resultado, json.load(f))
+
+if __name__ == "__main__":
+    main()
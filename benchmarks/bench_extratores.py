@@ -0,0 +1,47 @@
+# Compara o tempo de extração dos backends de extrator.py sobre os arquivos de uma pasta.
+# Uso: python benchmarks/bench_extratores.py [pasta] [repeticoes]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from extrator import EXTRATORES, buscar_palavra_em_docx
+
+PASTA_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Arquivos de teste")
+
+
+# Função para medir o tempo médio por arquivo de uma operação repetida sobre a pasta
+def medir(caminhos, repeticoes, operacao):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for caminho in caminhos:
+            operacao(caminho)
+    return (time.perf_counter() - inicio) / (repeticoes * len(caminhos))
+
+def main():
+    pasta = sys.argv[1] if len(sys.argv) > 1 else PASTA_PADRAO
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    caminhos = [os.path.join(pasta, arquivo) for arquivo in sorted(os.listdir(pasta)) if arquivo.endswith(".docx")]
+    if not caminhos:
+        print(f"Nenhum arquivo .docx em {pasta}")
+        return
+
+    print(f"{len(caminhos)} arquivo(s), {repeticoes} repetição(ões)")
+    tempos = {}
+    for backend, extrator in EXTRATORES.items():
+        try:
+            tempos[backend] = medir(caminhos, repeticoes, lambda caminho: list(extrator(caminho)))
+        except ImportError as e:
+            print(f"{backend:>12}: indisponível ({e})")
+            continue
+        # Busca por um termo do primeiro parágrafo, que permite parar a leitura cedo
+        primeiro = medir(caminhos, repeticoes, lambda caminho: buscar_palavra_em_docx(caminho, "a", backend))
+        print(f"{backend:>12}: extração {tempos[backend] * 1000:.3f} ms/arquivo, "
+              f"busca com parada antecipada {primeiro * 1000:.3f} ms/arquivo")
+
+    if "xml" in tempos and "python-docx" in tempos:
+        print(f"Ganho do backend xml: {tempos['python-docx'] / tempos['xml']:.1f}x")
+
+if __name__ == "__main__":
+    main()
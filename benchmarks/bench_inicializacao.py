@@ -0,0 +1,109 @@
+# Mede o tempo de inicialização em processos novos do Python: importação do núcleo de busca
+# (sem Qt) e tempo até a janela aparecer, contado desde o início do processo até a janela
+# (BuscaPalavrasApp) ser mostrada. Com --importtime, mostra também os módulos mais pesados
+# segundo "python -X importtime". Com --projeto, mede outra cópia do projeto (por exemplo, um
+# "git worktree" de uma versão anterior), para comparar antes e depois de uma mudança.
+# Uso: python benchmarks/bench_inicializacao.py [repeticoes] [--importtime] [--projeto PASTA]
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PASTA_PROJETO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CODIGO_NUCLEO = """
+import time
+inicio = time.perf_counter()
+import busca
+print(time.perf_counter() - inicio)
+"""
+
+# A janela avisa que apareceu; o tempo é medido pelo processo que a abriu, desde o início
+# do processo novo (inclui a inicialização do próprio Python)
+CODIGO_JANELA = """
+from PySide6.QtWidgets import QApplication
+import Busca4
+app = QApplication([])
+janela = Busca4.BuscaPalavrasApp()
+janela.show()
+app.processEvents()
+print("janela", flush=True)
+"""
+
+
+# Função para executar um trecho de código em um processo novo, devolvendo (saída, saída de erro)
+def executar_em_processo(codigo, opcoes=(), projeto=PASTA_PROJETO):
+    resultado = subprocess.run(
+        [sys.executable, *opcoes, "-c", codigo], cwd=projeto, env=ambiente_medicao(),
+        capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+    return resultado.stdout, resultado.stderr
+
+# Função para executar um trecho de código em um processo novo e devolver o tempo impresso por ele
+def medir_em_processo(codigo, projeto=PASTA_PROJETO):
+    saida, _ = executar_em_processo(codigo, projeto=projeto)
+    return float(saida.strip().splitlines()[-1])
+
+# Função para medir o tempo entre o início de um processo novo e o aviso de que a janela apareceu
+def medir_ate_janela(projeto=PASTA_PROJETO):
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, "-c", CODIGO_JANELA], cwd=projeto, env=ambiente_medicao(),
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    linha = processo.stdout.readline()
+    tempo = time.perf_counter() - inicio
+    _, erros = processo.communicate()
+    if linha.strip() != "janela":
+        raise RuntimeError((erros.strip().splitlines() or ["a janela não apareceu"])[-1])
+    return tempo
+
+def ambiente_medicao():
+    ambiente = dict(os.environ)
+    ambiente.setdefault("QT_QPA_PLATFORM", "offscreen")  # Permite medir em máquinas sem tela
+    return ambiente
+
+# Função para listar os módulos com maior tempo acumulado de importação
+def modulos_mais_pesados(saida_importtime, quantidade=10):
+    modulos = []
+    for linha in saida_importtime.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, campos = linha.split(":", 1)
+        _, acumulado, nome = campos.split("|")
+        modulos.append((int(acumulado), nome.strip()))
+    return sorted(modulos, reverse=True)[:quantidade]
+
+def main():
+    argumentos = sys.argv[1:]
+    projeto = PASTA_PROJETO
+    if "--projeto" in argumentos:
+        posicao = argumentos.index("--projeto")
+        projeto = os.path.abspath(argumentos[posicao + 1])
+        del argumentos[posicao:posicao + 2]
+    argumentos = [argumento for argumento in argumentos if not argumento.startswith("--")]
+    repeticoes = int(argumentos[0]) if argumentos else 10
+
+    medicoes = [
+        ("importar o núcleo (busca)", CODIGO_NUCLEO, lambda: medir_em_processo(CODIGO_NUCLEO, projeto)),
+        ("do início do processo à janela (Busca4)", CODIGO_JANELA, lambda: medir_ate_janela(projeto)),
+    ]
+    for descricao, codigo, medir in medicoes:
+        try:
+            tempos = [medir() for _ in range(repeticoes)]
+        except RuntimeError as e:
+            print(f"{descricao}: indisponível ({e})")
+            continue
+        print(f"{descricao}: mediana {statistics.median(tempos) * 1000:.1f} ms, "
+              f"mínimo {min(tempos) * 1000:.1f} ms ({repeticoes} execuções)")
+
+        if "--importtime" in sys.argv:
+            _, saida = executar_em_processo(codigo, ["-X", "importtime"], projeto)
+            for acumulado, nome in modulos_mais_pesados(saida):
+                print(f"    {acumulado / 1000:8.1f} ms  {nome}")
+
+if __name__ == "__main__":
+    main()
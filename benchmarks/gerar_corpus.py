@@ -0,0 +1,92 @@
+# Gera um corpus sintético de arquivos .docx para os benchmarks, sem depender do python-docx.
+# Uso: python benchmarks/gerar_corpus.py PASTA [--arquivos N] [--paragrafos N] [--palavras N]
+#          [--tabelas FRACAO] [--padrao "{codigo} - {empresa} - {status}.docx"] [--semente N]
+import argparse
+import os
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+VOCABULARIO = (
+    "contrato pavimento concreto solos moles asfalto ensaio laudo obra rodovia ponte drenagem "
+    "sondagem compactação camada base sub-base revestimento fiscalização medição prazo cláusula "
+    "empresa serviço execução projeto aprovação vistoria relatório pagamento reajuste garantia "
+    "não são técnico responsável engenharia material amostra resultado aprovado reprovado"
+).split()
+EMPRESAS = ["dyna", "alfa engenharia", "beta obras", "gama construtora", "delta pavimentos"]
+STATUS = ["ok", "pendente", "cancelado", "em análise"]
+
+TIPOS_CONTEUDO = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+RELACOES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+NS_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+# Função para montar o XML de um parágrafo com um texto aleatório
+def paragrafo_xml(aleatorio, palavras):
+    texto = " ".join(aleatorio.choice(VOCABULARIO) for _ in range(palavras))
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(texto.capitalize())}</w:t></w:r></w:p>'
+
+# Função para montar o XML de uma tabela pequena (3 x 3) com textos aleatórios
+def tabela_xml(aleatorio, palavras):
+    linhas = []
+    for _ in range(3):
+        celulas = "".join(f"<w:tc>{paragrafo_xml(aleatorio, max(1, palavras // 4))}</w:tc>" for _ in range(3))
+        linhas.append(f"<w:tr>{celulas}</w:tr>")
+    return f"<w:tbl>{''.join(linhas)}</w:tbl>"
+
+# Função para gravar um arquivo .docx mínimo com o corpo informado
+def gravar_docx(caminho, corpo):
+    documento = f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>' \
+                f'<w:document xmlns:w="{NS_W}"><w:body>{corpo}<w:sectPr/></w:body></w:document>'
+    with zipfile.ZipFile(caminho, "w", zipfile.ZIP_DEFLATED) as pacote:
+        pacote.writestr("[Content_Types].xml", TIPOS_CONTEUDO)
+        pacote.writestr("_rels/.rels", RELACOES)
+        pacote.writestr("word/document.xml", documento)
+
+# Função para gerar o corpus: cada arquivo recebe um código sequencial, uma empresa e um status
+def gerar_corpus(pasta, arquivos=1000, paragrafos=50, palavras=20, tabelas=0.1,
+                 padrao="{codigo} - {empresa} - {status}.docx", semente=0):
+    aleatorio = random.Random(semente)
+    os.makedirs(pasta, exist_ok=True)
+    nomes = []
+    for numero in range(arquivos):
+        blocos = []
+        for _ in range(paragrafos):
+            if aleatorio.random() < tabelas:
+                blocos.append(tabela_xml(aleatorio, palavras))
+            else:
+                blocos.append(paragrafo_xml(aleatorio, palavras))
+        nome = padrao.format(codigo=f"{numero + 1:06d}", empresa=aleatorio.choice(EMPRESAS),
+                             status=aleatorio.choice(STATUS))
+        gravar_docx(os.path.join(pasta, nome), "".join(blocos))
+        nomes.append(nome)
+    return nomes
+
+def ler_argumentos(argumentos=None):
+    parser = argparse.ArgumentParser(description="Gera arquivos .docx sintéticos para os benchmarks.")
+    parser.add_argument("pasta")
+    parser.add_argument("--arquivos", type=int, default=1000, help="quantidade de arquivos (padrão: 1000)")
+    parser.add_argument("--paragrafos", type=int, default=50, help="blocos por documento (padrão: 50)")
+    parser.add_argument("--palavras", type=int, default=20, help="palavras por parágrafo (padrão: 20)")
+    parser.add_argument("--tabelas", type=float, default=0.1,
+                        help="fração dos blocos que são tabelas 3x3 (padrão: 0.1)")
+    parser.add_argument("--padrao", default="{codigo} - {empresa} - {status}.docx",
+                        help="padrão do nome dos arquivos (campos: codigo, empresa, status)")
+    parser.add_argument("--semente", type=int, default=0, help="semente do gerador aleatório")
+    return parser.parse_args(argumentos)
+
+if __name__ == "__main__":
+    args = ler_argumentos()
+    nomes = gerar_corpus(args.pasta, args.arquivos, args.paragrafos, args.palavras, args.tabelas,
+                         args.padrao, args.semente)
+    print(f"{len(nomes)} arquivo(s) gerado(s) em {args.pasta}")
@@ -0,0 +1,97 @@
+import os
+import sys
+from fnmatch import fnmatch
+
+import perfil
+from metadados import interpretar_nome
+from multitermos import varrer_termos_nos_arquivos
+from varredura import NUM_PROCESSOS_PADRAO, TAMANHO_LOTE_PADRAO
+
+# Prefixo dos arquivos temporários que o Word cria ao lado de um documento aberto
+PREFIXO_ARQUIVO_TRAVA = "~$"
+
+
+# Função para saber se um caminho relativo (com "/") combina com algum dos padrões glob
+def combina(caminho, padroes):
+    nome = caminho.rsplit("/", 1)[-1]
+    return any(fnmatch(caminho, padrao) or fnmatch(nome, padrao) for padrao in padroes)
+
+# Função para percorrer uma pasta e suas subpastas, devolvendo os arquivos .docx (caminhos
+# relativos à pasta, separados por "/") à medida que são encontrados, sem esperar a listagem
+# inteira. Os padrões de inclusão e exclusão (glob, como "2023/*" ou "*rascunho*") valem para
+# o caminho relativo ou para o nome; uma pasta excluída não é percorrida. Os arquivos de trava
+# do Word (~$*.docx) são ignorados, e links para pastas não são seguidos (um link que aponta
+# para uma pasta acima repetiria os mesmos arquivos sem fim).
+def percorrer_docx(pasta, incluir=None, excluir=None, recursivo=True):
+    pendentes = [""]
+    while pendentes:
+        relativo = pendentes.pop()
+        try:
+            with perfil.medir_etapa("listagem"):
+                with os.scandir(os.path.join(pasta, relativo)) as entradas:
+                    entradas = sorted(entradas, key=lambda entrada: entrada.name)
+        except OSError as e:
+            if not relativo:
+                raise
+            print(f"Erro ao listar a pasta {os.path.join(pasta, relativo)}: {e}", file=sys.stderr)
+            continue
+
+        subpastas = []
+        for entrada in entradas:
+            caminho = relativo + entrada.name
+            if excluir and combina(caminho, excluir):
+                continue
+            try:
+                eh_pasta = entrada.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if eh_pasta:
+                if recursivo:
+                    subpastas.append(caminho + "/")
+            elif (entrada.name.endswith(".docx") and not entrada.name.startswith(PREFIXO_ARQUIVO_TRAVA)
+                  and (not incluir or combina(caminho, incluir))):
+                yield caminho
+        # Subpastas em ordem alfabética, cada uma percorrida por inteiro antes da seguinte
+        pendentes.extend(reversed(subpastas))
+
+# Função para percorrer várias pastas (por exemplo, em compartilhamentos de rede diferentes),
+# devolvendo o caminho completo de cada arquivo .docx encontrado
+def percorrer_pastas(pastas, incluir=None, excluir=None, recursivo=True):
+    for pasta in pastas:
+        for arquivo in percorrer_docx(pasta, incluir, excluir, recursivo):
+            yield os.path.join(pasta, arquivo)
+
+# Função para obter a lista de arquivos .docx de uma pasta (e das subpastas) ordenada pelo nome
+def obter_arquivos_docx(pasta, incluir=None, excluir=None, recursivo=True):
+    arquivos = list(percorrer_docx(pasta, incluir, excluir, recursivo))
+    arquivos.sort()  # Ordena os arquivos pelo nome
+    return arquivos
+
+# Função para buscar uma palavra na lista de arquivos .docx, dividindo o trabalho entre processos
+# e reaproveitando o texto dos arquivos já lidos em buscas anteriores
+def buscar_palavra_nos_arquivos(pasta, arquivos, palavra, progress_callback=None,
+                                num_processos=NUM_PROCESSOS_PADRAO, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    encontrados = set()
+    resultados = varrer_termos_nos_arquivos(
+        pasta, arquivos, [palavra],
+        num_processos=num_processos, tamanho_lote=tamanho_lote,
+        progress_callback=progress_callback  # Atualiza a barra de progresso se o callback foi fornecido
+    )
+    for arquivo, presenca in resultados:
+        if presenca[0]:
+            encontrados.add(arquivo)
+
+    # Os resultados chegam na ordem em que os processos terminam; devolve na ordem da lista
+    return [arquivo for arquivo in arquivos if arquivo in encontrados]
+
+# Função para criar um dicionário de uma lista de arquivos .docx
+def criar_dicionario_arquivos(arquivos):
+    dicionario = {}
+    for arquivo in arquivos:
+        dados = interpretar_nome(arquivo)
+        if dados is None:
+            # Caso o nome do arquivo não tenha o formato esperado, exibe uma mensagem de erro
+            print(f"Formato inesperado ou erro ao converter o código no arquivo: {arquivo}", file=sys.stderr)
+            continue
+        dicionario[arquivo] = {"Código": dados.codigo, "Empresa": dados.empresa, "Status": dados.status}
+    return dicionario
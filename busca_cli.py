@@ -0,0 +1,145 @@
+# Busca de palavras em arquivos .docx pela linha de comando, sem interface gráfica (não importa o Qt).
+# Mostra os arquivos que contêm o primeiro termo; os demais termos viram colunas Sim/Não,
+# como na segunda busca da interface. Os resultados saem à medida que cada arquivo termina.
+#
+# A pasta é percorrida com as subpastas, e a busca começa enquanto a listagem ainda anda.
+#
+# Uso: python busca_cli.py PASTA TERMO [TERMO ...] [--formato csv|jsonl] [--processos N] [--lote N]
+#          [--perfil relatorio.json] [--agrupar empresa|status] [--pasta-adicional PASTA ...]
+#          [--incluir PADRAO ...] [--excluir PADRAO ...] [--sem-subpastas] [--tempo-limite S]
+#          [--sem-quarentena]
+import argparse
+import csv
+import json
+import os
+import sys
+
+import perfil
+from busca import percorrer_docx, percorrer_pastas
+from consulta import ErroConsulta, varrer_consultas_nos_arquivos
+from metadados import CatalogoArquivos
+from quarentena import Quarentena
+from varredura import NUM_PROCESSOS_PADRAO, TAMANHO_LOTE_PADRAO, TEMPO_LIMITE_PADRAO
+
+CAMPOS_ARQUIVO = ["Arquivo", "Código", "Empresa", "Status"]
+
+
+# Função para ler os argumentos da linha de comando
+def ler_argumentos(argumentos=None):
+    parser = argparse.ArgumentParser(description="Busca palavras nos arquivos .docx de uma pasta.")
+    parser.add_argument("pasta", help="pasta com os arquivos .docx")
+    parser.add_argument("termos", nargs="+", help="primeiro termo (filtro) e termos adicionais (colunas)")
+    parser.add_argument("--formato", choices=["csv", "jsonl"], default="csv", help="formato da saída (padrão: csv)")
+    parser.add_argument("--processos", type=int, default=NUM_PROCESSOS_PADRAO,
+                        help="quantidade de processos (padrão: todos os núcleos)")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO,
+                        help=f"arquivos enviados a cada processo por vez (padrão: {TAMANHO_LOTE_PADRAO})")
+    parser.add_argument("--perfil", metavar="ARQUIVO",
+                        help="mede o tempo de cada etapa e grava o relatório em JSON nesse arquivo")
+    parser.add_argument("--agrupar", choices=["empresa", "status"],
+                        help="ao final, mostra na saída de erro quantos arquivos foram encontrados por empresa ou status")
+    parser.add_argument("--pasta-adicional", action="append", default=[], metavar="PASTA",
+                        help="outra pasta onde buscar (pode ser repetido); os arquivos saem com o caminho completo")
+    parser.add_argument("--incluir", action="append", metavar="PADRAO",
+                        help='só arquivos cujo caminho ou nome combina com o padrão, como "2023/*" (pode ser repetido)')
+    parser.add_argument("--excluir", action="append", metavar="PADRAO",
+                        help='ignora arquivos e subpastas que combinam com o padrão, como "*rascunho*" (pode ser repetido)')
+    parser.add_argument("--sem-subpastas", action="store_true", help="não percorre as subpastas")
+    parser.add_argument("--tempo-limite", type=float, default=TEMPO_LIMITE_PADRAO, metavar="S",
+                        help=f"tempo máximo de leitura de um arquivo, em segundos (padrão: {TEMPO_LIMITE_PADRAO})")
+    parser.add_argument("--sem-quarentena", action="store_true",
+                        help="lê também os arquivos em quarentena (com erro em buscas anteriores) e não grava a quarentena")
+    return parser.parse_args(argumentos)
+
+# Função para montar a linha de saída de um arquivo encontrado
+def montar_linha(catalogo, arquivo, termos, presenca):
+    dados = catalogo.dados(arquivo) or {}
+    linha = {"Arquivo": arquivo}
+    for campo in CAMPOS_ARQUIVO[1:]:
+        linha[campo] = dados.get(campo, "")
+    for termo, encontrado in zip(termos[1:], presenca[1:]):
+        linha[termo] = "Sim" if encontrado else "Não"
+    return linha
+
+# Função para mostrar, na saída de erro, o resumo dos arquivos que a busca não leu, por tipo de erro
+def resumir_erros(erros):
+    contagem = {}
+    for arquivo, erro in erros:
+        contagem[erro.tipo] = contagem.get(erro.tipo, 0) + 1
+    resumo = ", ".join(f"{quantidade} {tipo}" for tipo, quantidade in sorted(contagem.items()))
+    print(f"{len(erros)} arquivo(s) não foram lidos: {resumo}", file=sys.stderr)
+
+def main(argumentos=None):
+    args = ler_argumentos(argumentos)
+    perfil_busca = perfil.ativar() if args.perfil else None
+    pastas = [args.pasta] + args.pasta_adicional
+    for pasta in pastas:
+        if not os.path.isdir(pasta):
+            print(f"Erro ao listar a pasta {pasta}: não é uma pasta", file=sys.stderr)
+            return 2
+    opcoes_listagem = (args.incluir, args.excluir, not args.sem_subpastas)
+    if args.pasta_adicional:
+        # Com várias pastas, cada arquivo é identificado pelo caminho completo
+        pasta_base, listagem = "", percorrer_pastas(pastas, *opcoes_listagem)
+    else:
+        pasta_base, listagem = args.pasta, percorrer_docx(args.pasta, *opcoes_listagem)
+    catalogo = CatalogoArquivos()
+    erros = []  # (arquivo, erro) dos arquivos que não foram lidos
+
+    # Cada arquivo não lido é avisado assim que acontece; o resumo sai no final
+    def ignorar(arquivo, erro):
+        erros.append((arquivo, erro))
+        print(f"Arquivo ignorado ({erro.tipo}): {arquivo}: {erro}", file=sys.stderr)
+
+    # Os nomes entram no catálogo à medida que a listagem encontra os arquivos
+    def descobrir():
+        for arquivo in listagem:
+            if catalogo.adicionar(arquivo):
+                print(f"Formato inesperado ou erro ao converter o código no arquivo: {arquivo}", file=sys.stderr)
+            yield arquivo
+
+    try:
+        resultados = varrer_consultas_nos_arquivos(
+            pasta_base, descobrir(), args.termos, catalogo=catalogo, num_processos=args.processos,
+            tamanho_lote=args.lote, tempo_limite=args.tempo_limite or None,
+            quarentena=None if args.sem_quarentena else Quarentena(), ignorado_callback=ignorar
+        )
+    except ErroConsulta as e:
+        print(f"Consulta inválida: {e}", file=sys.stderr)
+        return 2
+
+    if args.formato == "csv":
+        escritor = csv.DictWriter(sys.stdout, fieldnames=CAMPOS_ARQUIVO + args.termos[1:])
+        escritor.writeheader()
+        escrever = escritor.writerow
+    else:
+        escrever = lambda linha: sys.stdout.write(json.dumps(linha, ensure_ascii=False) + "\n")
+
+    encontrados = []
+    try:
+        for arquivo, presenca in resultados:
+            if presenca[0]:
+                encontrados.append(arquivo)
+                escrever(montar_linha(catalogo, arquivo, args.termos, presenca))
+                sys.stdout.flush()
+    except BrokenPipeError:
+        # Saída fechada antes do fim (por exemplo, "| head"): encerra sem mensagem de erro
+        sys.stderr.close()
+        return 0
+
+    if perfil_busca:
+        perfil.desativar()
+        perfil_busca.exportar_json(args.perfil)
+
+    if erros:
+        resumir_erros(erros)
+
+    if args.agrupar:
+        for valor, arquivos_grupo in sorted(catalogo.agrupar(args.agrupar, encontrados).items()):
+            print(f"{valor}: {len(arquivos_grupo)}", file=sys.stderr)
+
+    # Como o grep: 0 quando algum arquivo contém o primeiro termo, 1 quando nenhum contém
+    return 0 if encontrados else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+import os
+import sys
+import threading
+from collections import OrderedDict, deque
+
+import perfil
+from extrator import extrair_paragrafos_docx
+from filtro_termos import montar_mapa
+from normalizacao import normalizar
+from varredura import avisar_ignorado, varrer_em_paralelo
+
+# Memória máxima ocupada pelos textos guardados; acima disso os menos usados são descartados
+LIMITE_MEMORIA_PADRAO = 128 * 1024 * 1024
+# Memória máxima ocupada pelos mapas de trigramas (filtro_termos.py) dos documentos
+LIMITE_MAPAS_PADRAO = 32 * 1024 * 1024
+
+# Versão do texto guardado; muda quando a forma de extrair ou normalizar o texto muda,
+# para que os arquivos gravados em disco por versões anteriores sejam ignorados
+VERSAO_TEXTO = 2
+
+
+# Função para estimar a memória ocupada pelo texto de um documento
+def tamanho_em_memoria(paragrafos):
+    return sys.getsizeof(paragrafos) + sum(sys.getsizeof(texto) for texto in paragrafos)
+
+
+# Classe que guarda o texto já extraído (normalizado) de cada documento, identificado pelo
+# caminho, data de modificação e tamanho do arquivo. Quando o limite de memória é atingido,
+# os documentos usados há mais tempo saem da memória e, se houver uma pasta de disco
+# configurada, são gravados nela para serem lidos de volta sem abrir o .docx de novo.
+# Junto com o texto fica o mapa de trigramas do documento, bem menor, que continua na
+# memória mesmo depois que o texto sai dela: ele descarta nas buscas seguintes, sem ler
+# o documento, os arquivos que com certeza não contêm os termos.
+class CacheTexto:
+    def __init__(self, limite_memoria=LIMITE_MEMORIA_PADRAO, pasta_disco=None, limite_mapas=LIMITE_MAPAS_PADRAO):
+        self.limite_memoria = limite_memoria
+        self.pasta_disco = pasta_disco
+        self.textos = OrderedDict()  # Chave -> (parágrafos, tamanho em memória)
+        self.memoria_ocupada = 0
+        self.limite_mapas = limite_mapas
+        self.mapas = OrderedDict()  # Chave -> mapa de trigramas
+        self.memoria_mapas = 0
+        self.trava = threading.Lock()
+        if pasta_disco:
+            os.makedirs(pasta_disco, exist_ok=True)
+
+    def chave(self, arquivo):
+        estado = os.stat(arquivo)
+        return (os.path.abspath(arquivo), estado.st_mtime_ns, estado.st_size)
+
+    def caminho_disco(self, chave):
+        import hashlib
+        nome = hashlib.sha1(repr((VERSAO_TEXTO,) + chave).encode("utf-8")).hexdigest()
+        return os.path.join(self.pasta_disco, nome + ".json")
+
+    # Retorna os parágrafos guardados do arquivo, ou None se o arquivo mudou ou nunca foi lido
+    def obter(self, arquivo):
+        try:
+            chave = self.chave(arquivo)
+        except OSError:
+            return None
+        with self.trava:
+            if chave in self.textos:
+                self.textos.move_to_end(chave)
+                return self.textos[chave][0]
+        if not self.pasta_disco:
+            return None
+        import json
+        try:
+            with open(self.caminho_disco(chave), encoding="utf-8") as f:
+                paragrafos = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self.guardar_na_memoria(chave, paragrafos)
+        return paragrafos
+
+    def guardar(self, arquivo, paragrafos, mapa=None):
+        try:
+            chave = self.chave(arquivo)
+        except OSError:
+            return
+        self.guardar_na_memoria(chave, paragrafos)
+        if mapa is not None:
+            self.guardar_mapa(chave, mapa)
+
+    # Retorna o mapa de trigramas do arquivo, ou None se o arquivo mudou ou não tem mapa
+    def obter_mapa(self, arquivo):
+        if not self.mapas:
+            return None
+        try:
+            chave = self.chave(arquivo)
+        except OSError:
+            return None
+        with self.trava:
+            return self.mapas.get(chave)
+
+    def guardar_mapa(self, chave, mapa):
+        with self.trava:
+            if chave in self.mapas:
+                self.memoria_mapas -= len(self.mapas.pop(chave))
+            self.mapas[chave] = mapa
+            self.memoria_mapas += len(mapa)
+            while self.memoria_mapas > self.limite_mapas and len(self.mapas) > 1:
+                self.memoria_mapas -= len(self.mapas.popitem(last=False)[1])
+
+    def guardar_na_memoria(self, chave, paragrafos):
+        tamanho = tamanho_em_memoria(paragrafos)
+        with self.trava:
+            if chave in self.textos:
+                self.memoria_ocupada -= self.textos.pop(chave)[1]
+            self.textos[chave] = (paragrafos, tamanho)
+            self.memoria_ocupada += tamanho
+
+            # Descarta os menos usados até voltar ao limite (mantendo ao menos o último guardado)
+            while self.memoria_ocupada > self.limite_memoria and len(self.textos) > 1:
+                chave_antiga, (paragrafos_antigos, tamanho_antigo) = self.textos.popitem(last=False)
+                self.memoria_ocupada -= tamanho_antigo
+                self.gravar_no_disco(chave_antiga, paragrafos_antigos)
+
+    def gravar_no_disco(self, chave, paragrafos):
+        if not self.pasta_disco:
+            return
+        import json
+        caminho = self.caminho_disco(chave)
+        if os.path.exists(caminho):
+            return
+        try:
+            with open(caminho, "w", encoding="utf-8") as f:
+                json.dump(paragrafos, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"Erro ao gravar o texto em cache {caminho}: {e}", file=sys.stderr)
+
+    def limpar(self):
+        with self.trava:
+            self.textos.clear()
+            self.memoria_ocupada = 0
+            self.mapas.clear()
+            self.memoria_mapas = 0
+
+
+# Cache usado pela interface e pelas buscas em sequência (primeira palavra, segunda palavra...)
+cache_textos = CacheTexto()
+
+
+# Função executada nos processos da varredura: extrai o texto normalizado de um arquivo
+# .docx e monta o mapa de trigramas dele, os dois guardados no cache pelo processo principal
+def ler_documento(arquivo):
+    with perfil.medir_etapa("extracao"):
+        paragrafos = [normalizar(texto) for texto in extrair_paragrafos_docx(arquivo)]
+    with perfil.medir_etapa("mapa_trigramas"):
+        return paragrafos, montar_mapa(paragrafos)
+
+# Função para avaliar os arquivos aproveitando o texto em cache. Os arquivos já lidos são
+# avaliados na hora com avaliar(paragrafos); os demais vão para os processos da varredura,
+# onde trabalho(arquivo, *argumentos) devolve (paragrafos, mapa, resultado), e o texto
+# extraído e o mapa são guardados no cache. Os arquivos podem vir de uma lista ou de um
+# gerador (a varredura começa antes de a listagem terminar). Devolve (arquivo, resultado)
+# à medida que cada arquivo termina.
+def varrer_com_cache(pasta, arquivos, avaliar, trabalho, argumentos=(), cache=cache_textos,
+                     progress_callback=None, cancelamento=None, ignorado_callback=None, **opcoes_varredura):
+    total_arquivos = len(arquivos) if hasattr(arquivos, "__len__") else 0
+    em_cache = deque()  # Resultados dos arquivos em cache, ainda não devolvidos
+    vistos = 0
+
+    # Separa os arquivos em cache à medida que a varredura pede os próximos arquivos
+    def faltando():
+        nonlocal vistos, listagem_terminada
+        for arquivo in arquivos:
+            vistos += 1
+            paragrafos = cache.obter(os.path.join(pasta, arquivo))
+            if paragrafos is None:
+                yield arquivo
+            else:
+                em_cache.append((arquivo, avaliar(paragrafos)))
+        listagem_terminada = True
+
+    processados = 0
+
+    def avisar_progresso():
+        if progress_callback:
+            progress_callback(processados, total_arquivos or (vistos if listagem_terminada else 0))
+
+    # Arquivos não lidos também contam no progresso
+    def ignorar(arquivo, erro):
+        nonlocal processados
+        processados += 1
+        avisar_ignorado(pasta, arquivo, erro, ignorado_callback)
+        avisar_progresso()
+
+    listagem_terminada = False
+    resultados = varrer_em_paralelo(pasta, faltando(), trabalho, argumentos, cancelamento=cancelamento,
+                                    ignorado_callback=ignorar, **opcoes_varredura)
+    for arquivo, (paragrafos, mapa, resultado) in resultados:
+        while em_cache:
+            processados += 1
+            yield em_cache.popleft()
+            avisar_progresso()
+        cache.guardar(os.path.join(pasta, arquivo), paragrafos, mapa)
+        processados += 1
+        yield arquivo, resultado
+        avisar_progresso()
+
+    while em_cache and not (cancelamento and cancelamento.is_set()):
+        processados += 1
+        yield em_cache.popleft()
+        avisar_progresso()
@@ -0,0 +1,633 @@
+import bisect
+import os
+import re
+from collections import deque
+
+import perfil
+from cache_texto import cache_textos, ler_documento, varrer_com_cache
+from filtro_termos import codigos_trigramas, pode_conter
+from indice import PADRAO_TERMO, extrair_termos
+from metadados import CAMPOS, interpretar_nome
+from multitermos import obter_automato
+from normalizacao import normalizar
+
+# Consultas com operadores (AND, OR, NOT, NEAR/n), frases entre aspas, parênteses, prefixos
+# com "*" ou filtros por campo do nome do arquivo (status=ok) são analisadas por este módulo;
+# as demais mantêm a busca por trecho de texto original
+PADRAO_CONSULTA_AVANCADA = re.compile(r'\b(?:AND|OR|NOT)\b|\bNEAR/\d+\b|["()*]|(?i:\b(?:c[oó]digo|empresa|status))=')
+PADRAO_TOKEN = re.compile(
+    r'\s*(?:(\()|(\))|(?i:(c[oó]digo|empresa|status))=(?:"([^"]*)("?)|([^\s()"]*))|"([^"]*)("?)|([^\s()"]+))'
+)
+PADRAO_PERTO = re.compile(r"^NEAR/(\d+)$")
+
+
+# Erro de sintaxe em uma consulta (parênteses ou aspas sem fechamento, operador sem termo...)
+class ErroConsulta(ValueError):
+    pass
+
+
+# Função para saber se o texto digitado usa a linguagem de consulta ou é um trecho simples
+def eh_consulta_avancada(texto):
+    return bool(PADRAO_CONSULTA_AVANCADA.search(texto))
+
+
+# Termo da consulta: uma palavra exata ou, com "*" no final, qualquer palavra que comece com ela
+class Termo:
+    def __init__(self, texto, prefixo=False):
+        self.texto = texto
+        self.prefixo = prefixo
+        self.codigos = None  # Códigos dos trigramas da palavra, calculados no primeiro uso
+
+    def custo(self):
+        return 2 if self.prefixo else 1
+
+    def posicoes(self, termos):
+        if not self.prefixo:
+            return set(termos.get(self.texto, ()))
+        return {p for termo, lista in termos.items() if termo.startswith(self.texto) for p in lista}
+
+    def trechos(self, termos):
+        return [(p, p) for p in self.posicoes(termos)]
+
+    # Palavras a destacar no texto quando a consulta é atendida: (palavra, é prefixo)
+    def palavras_destacadas(self):
+        return [(self.texto, self.prefixo)]
+
+    # False quando o mapa de trigramas do documento prova que a palavra não está nele
+    def admite(self, mapa):
+        if self.codigos is None:
+            self.codigos = codigos_trigramas([self.texto])
+        return pode_conter(mapa, self.codigos)
+
+    def avaliar_documento(self, termos):
+        if not self.prefixo:
+            return self.texto in termos
+        return any(termo.startswith(self.texto) for termo in termos)
+
+    def condicao(self):
+        if self.prefixo:
+            return "substr(termo, 1, ?) = ?", (len(self.texto), self.texto)
+        return "termo = ?", (self.texto,)
+
+    def estimar(self, indice):
+        return indice.frequencia(*self.condicao())
+
+    def avaliar_indice(self, indice, candidatos):
+        return indice.arquivos_com(*self.condicao(), candidatos)
+
+    def trechos_indice(self, indice, candidatos):
+        return {
+            nome: [(p, p) for p in posicoes]
+            for nome, posicoes in indice.posicoes_por_arquivo(*self.condicao(), candidatos).items()
+        }
+
+
+# Frase entre aspas: as palavras precisam aparecer em sequência, no mesmo parágrafo
+class Frase:
+    def __init__(self, palavras):
+        self.palavras = palavras
+
+    def custo(self):
+        return sum(palavra.custo() for palavra in self.palavras) + 1
+
+    def palavras_destacadas(self):
+        return [destaque for palavra in self.palavras for destaque in palavra.palavras_destacadas()]
+
+    def admite(self, mapa):
+        return all(palavra.admite(mapa) for palavra in self.palavras)
+
+    def inicios(self, posicoes_palavras):
+        inicios = posicoes_palavras[0]
+        for deslocamento, posicoes in enumerate(posicoes_palavras[1:], start=1):
+            inicios = {p for p in inicios if p + deslocamento in posicoes}
+            if not inicios:
+                break
+        return inicios
+
+    def trechos(self, termos):
+        fim = len(self.palavras) - 1
+        inicios = self.inicios([palavra.posicoes(termos) for palavra in self.palavras])
+        return [(p, p + fim) for p in inicios]
+
+    def avaliar_documento(self, termos):
+        # Antes de montar as posições, confere se todas as palavras estão no documento
+        if not all(palavra.avaliar_documento(termos) for palavra in self.palavras):
+            return False
+        return bool(self.trechos(termos))
+
+    def estimar(self, indice):
+        return min(palavra.estimar(indice) for palavra in self.palavras)
+
+    def avaliar_indice(self, indice, candidatos):
+        return set(self.trechos_indice(indice, candidatos))
+
+    def trechos_indice(self, indice, candidatos):
+        # As palavras mais raras são lidas primeiro, e cada uma restringe os arquivos da seguinte
+        ordem = sorted(range(len(self.palavras)), key=lambda i: self.palavras[i].estimar(indice))
+        posicoes = [None] * len(self.palavras)
+        for i in ordem:
+            posicoes[i] = indice.posicoes_por_arquivo(*self.palavras[i].condicao(), candidatos)
+            candidatos = set(posicoes[i])
+            if not candidatos:
+                return {}
+
+        fim = len(self.palavras) - 1
+        trechos = {}
+        for nome in candidatos:
+            inicios = self.inicios([por_arquivo[nome] for por_arquivo in posicoes])
+            if inicios:
+                trechos[nome] = [(p, p + fim) for p in inicios]
+        return trechos
+
+
+# Função para juntar os trechos de dois lados de um NEAR/n que estão a no máximo n palavras
+# um do outro, em qualquer ordem. Devolve os trechos que cobrem cada par encontrado.
+def trechos_proximos(trechos_a, trechos_b, distancia):
+    if not trechos_a or not trechos_b:
+        return []
+    por_inicio = sorted(trechos_b)
+    inicios = [inicio for inicio, _ in por_inicio]
+    por_fim = sorted(trechos_b, key=lambda trecho: trecho[1])
+    fins = [fim for _, fim in por_fim]
+
+    juntos = set()
+    for inicio_a, fim_a in trechos_a:
+        # Trechos de b que começam logo depois de a, ou terminam logo antes
+        for i in range(bisect.bisect_left(inicios, fim_a + 1), bisect.bisect_right(inicios, fim_a + 1 + distancia)):
+            juntos.add((inicio_a, por_inicio[i][1]))
+        for i in range(bisect.bisect_left(fins, inicio_a - 1 - distancia), bisect.bisect_right(fins, inicio_a - 1)):
+            juntos.add((por_fim[i][0], fim_a))
+    return list(juntos)
+
+
+# Proximidade (a NEAR/n b): a e b separados por no máximo n palavras. A troca de
+# parágrafo conta como SALTO_ENTRE_PARAGRAFOS palavras.
+class Perto:
+    def __init__(self, a, b, distancia):
+        self.a = a
+        self.b = b
+        self.distancia = distancia
+
+    def custo(self):
+        return self.a.custo() + self.b.custo() + 1
+
+    def palavras_destacadas(self):
+        return self.a.palavras_destacadas() + self.b.palavras_destacadas()
+
+    def admite(self, mapa):
+        return self.a.admite(mapa) and self.b.admite(mapa)
+
+    def trechos(self, termos):
+        return trechos_proximos(self.a.trechos(termos), self.b.trechos(termos), self.distancia)
+
+    def avaliar_documento(self, termos):
+        if not (self.a.avaliar_documento(termos) and self.b.avaliar_documento(termos)):
+            return False
+        return bool(self.trechos(termos))
+
+    def estimar(self, indice):
+        return min(self.a.estimar(indice), self.b.estimar(indice))
+
+    def avaliar_indice(self, indice, candidatos):
+        return set(self.trechos_indice(indice, candidatos))
+
+    def trechos_indice(self, indice, candidatos):
+        primeiro, segundo = sorted([self.a, self.b], key=lambda lado: lado.estimar(indice))
+        trechos_primeiro = primeiro.trechos_indice(indice, candidatos)
+        if not trechos_primeiro:
+            return {}
+        trechos_segundo = segundo.trechos_indice(indice, set(trechos_primeiro))
+        trechos = {}
+        for nome, lista in trechos_segundo.items():
+            juntos = trechos_proximos(trechos_primeiro[nome], lista, self.distancia)
+            if juntos:
+                trechos[nome] = juntos
+        return trechos
+
+
+# Filtro por um campo do nome do arquivo (codigo=, empresa=, status=), com "*" no final para
+# prefixo. Só pode ser combinado com AND no nível principal da consulta, para que os arquivos
+# que não atendem sejam descartados antes de qualquer documento ser lido (filtro_de_arquivos).
+class Campo:
+    def __init__(self, campo, valor, prefixo=False):
+        self.campo = campo
+        self.valor = valor
+        self.prefixo = prefixo
+
+    def custo(self):
+        return 0
+
+    def palavras_destacadas(self):
+        return []
+
+    def admite(self, mapa):
+        return True  # Os filtros por campo são aplicados antes, pelo nome do arquivo
+
+    def atende(self, arquivo):
+        dados = interpretar_nome(arquivo)
+        if dados is None:
+            return False
+        valor = normalizar(dados[CAMPOS[self.campo]])
+        return valor.startswith(self.valor) if self.prefixo else valor == self.valor
+
+    # Na avaliação por documento o filtro já foi aplicado aos arquivos antes da leitura
+    def avaliar_documento(self, termos):
+        return True
+
+    def estimar(self, indice):
+        return 0  # Sem consulta ao índice: é sempre a primeira parte avaliada
+
+    def avaliar_indice(self, indice, candidatos):
+        return {arquivo for arquivo in universo(indice, candidatos) if self.atende(arquivo)}
+
+
+# Função para conferir que os filtros por campo só aparecem ligados por AND no nível principal
+def verificar_campos(arvore, principal=True):
+    if isinstance(arvore, Campo) and not principal:
+        raise ErroConsulta("Filtros por campo (status=, empresa=, codigo=) só podem ser combinados com AND.")
+    if isinstance(arvore, E):
+        for filho in arvore.filhos:
+            verificar_campos(filho, principal)
+    elif isinstance(arvore, Ou):
+        for filho in arvore.filhos:
+            verificar_campos(filho, False)
+    elif isinstance(arvore, Nao):
+        verificar_campos(arvore.filho, False)
+
+# Função para obter os filtros por campo de uma consulta já analisada
+def filtros_de_campo(arvore):
+    if isinstance(arvore, Campo):
+        return [arvore]
+    if isinstance(arvore, E):
+        return [filho for filho in arvore.filhos if isinstance(filho, Campo)]
+    return []
+
+# Função para montar o teste dos filtros por campo de uma consulta, aplicado a cada arquivo
+# antes de ler qualquer documento (None se a consulta não tem filtros). Com um catálogo da
+# pasta, os arquivos já catalogados são respondidos pelos índices por campo dele; os que
+# entram no catálogo depois (durante a listagem da pasta) são conferidos pelo nome.
+def filtro_de_arquivos(texto, catalogo=None):
+    filtros = filtros_de_campo(analisar_consulta(texto)) if eh_consulta_avancada(texto) else []
+    if not filtros:
+        return None
+    aceitos = conhecidos = None
+    if catalogo is not None:
+        conhecidos = set(catalogo.metadados)
+        aceitos = set.intersection(*(catalogo.filtrar(f.campo, f.valor, f.prefixo) for f in filtros))
+
+    def atende(arquivo):
+        if conhecidos is not None and arquivo in conhecidos:
+            return arquivo in aceitos
+        return all(filtro.atende(arquivo) for filtro in filtros)
+    return atende
+
+# Função para obter os arquivos considerados por um NOT: os candidatos ou, sem eles, todo o índice
+def universo(indice, candidatos):
+    return set(candidatos) if candidatos is not None else indice.arquivos_indexados()
+
+
+# Conjunção (a AND b, ou simplesmente "a b"). É aqui que o planejador atua: as partes mais
+# baratas (por documento) ou mais seletivas (no índice) são avaliadas primeiro, e a avaliação
+# para assim que nenhum arquivo sobra. As negações só são aplicadas no final, sobre o que sobrou.
+class E:
+    def __init__(self, filhos):
+        # Conjunções dentro de conjunções, como em "a (b c)", viram uma só
+        filhos = [neto for filho in filhos for neto in (filho.filhos if isinstance(filho, E) else [filho])]
+        self.filhos = sorted(filhos, key=lambda filho: filho.custo())
+
+    def custo(self):
+        return sum(filho.custo() for filho in self.filhos)
+
+    def palavras_destacadas(self):
+        return [destaque for filho in self.filhos for destaque in filho.palavras_destacadas()]
+
+    def admite(self, mapa):
+        return all(filho.admite(mapa) for filho in self.filhos)
+
+    def avaliar_documento(self, termos):
+        return all(filho.avaliar_documento(termos) for filho in self.filhos)
+
+    def positivos_e_negacoes(self):
+        return ([filho for filho in self.filhos if not isinstance(filho, Nao)],
+                [filho for filho in self.filhos if isinstance(filho, Nao)])
+
+    def estimar(self, indice):
+        positivos, _ = self.positivos_e_negacoes()
+        if not positivos:
+            return len(indice.arquivos_indexados())
+        return min(filho.estimar(indice) for filho in positivos)
+
+    def avaliar_indice(self, indice, candidatos):
+        positivos, negacoes = self.positivos_e_negacoes()
+        if not positivos:
+            resultado = universo(indice, candidatos)
+        else:
+            resultado = candidatos
+            for filho in sorted(positivos, key=lambda filho: filho.estimar(indice)):
+                resultado = filho.avaliar_indice(indice, resultado)
+                if not resultado:
+                    return set()
+        for negacao in negacoes:
+            resultado = resultado - negacao.filho.avaliar_indice(indice, resultado)
+            if not resultado:
+                break
+        return resultado
+
+
+# Disjunção (a OR b): cada parte só precisa ser avaliada nos arquivos que ainda não entraram
+class Ou:
+    def __init__(self, filhos):
+        self.filhos = sorted(filhos, key=lambda filho: filho.custo())
+
+    def custo(self):
+        return sum(filho.custo() for filho in self.filhos)
+
+    def palavras_destacadas(self):
+        return [destaque for filho in self.filhos for destaque in filho.palavras_destacadas()]
+
+    def admite(self, mapa):
+        return any(filho.admite(mapa) for filho in self.filhos)
+
+    def avaliar_documento(self, termos):
+        return any(filho.avaliar_documento(termos) for filho in self.filhos)
+
+    def estimar(self, indice):
+        return sum(filho.estimar(indice) for filho in self.filhos)
+
+    def avaliar_indice(self, indice, candidatos):
+        resultado = set()
+        for filho in self.filhos:
+            restantes = None if candidatos is None else set(candidatos) - resultado
+            if restantes is not None and not restantes:
+                break
+            resultado |= filho.avaliar_indice(indice, restantes)
+        return resultado
+
+
+# Negação (NOT a)
+class Nao:
+    def __init__(self, filho):
+        self.filho = filho
+
+    def custo(self):
+        return self.filho.custo()
+
+    # Palavras negadas não aparecem nos documentos encontrados; não há o que destacar
+    def palavras_destacadas(self):
+        return []
+
+    def admite(self, mapa):
+        return True  # O mapa só prova ausências; não descarta documentos para um NOT
+
+    def avaliar_documento(self, termos):
+        return not self.filho.avaliar_documento(termos)
+
+    def estimar(self, indice):
+        return len(indice.arquivos_indexados())
+
+    def avaliar_indice(self, indice, candidatos):
+        arquivos = universo(indice, candidatos)
+        return arquivos - self.filho.avaliar_indice(indice, arquivos)
+
+
+# Função para quebrar a consulta em tokens: parênteses, frases, operadores e palavras
+def separar_tokens(texto):
+    tokens = []
+    posicao = 0
+    texto = texto.rstrip()
+    while posicao < len(texto):
+        encontrado = PADRAO_TOKEN.match(texto, posicao)
+        abre, fecha, campo, valor_aspas, aspas_valor, valor, frase, aspas_final, palavra = encontrado.groups()
+        posicao = encontrado.end()
+        if abre:
+            tokens.append(("(", None))
+        elif fecha:
+            tokens.append((")", None))
+        elif campo:
+            if valor_aspas is not None and not aspas_valor:
+                raise ErroConsulta("Aspas sem fechamento na consulta.")
+            tokens.append(("campo", (campo, valor if valor_aspas is None else valor_aspas)))
+        elif frase is not None:
+            if not aspas_final:
+                raise ErroConsulta("Aspas sem fechamento na consulta.")
+            tokens.append(("frase", frase))
+        elif palavra in ("AND", "OR", "NOT"):
+            tokens.append((palavra, None))
+        elif PADRAO_PERTO.match(palavra):
+            tokens.append(("NEAR", int(PADRAO_PERTO.match(palavra).group(1))))
+        else:
+            tokens.append(("palavra", palavra))
+    return tokens
+
+
+# Função para montar o filtro correspondente a um campo=valor da consulta
+def montar_campo(campo, valor):
+    prefixo = valor.endswith("*")
+    valor = normalizar(valor.rstrip("*"))
+    if not valor:
+        raise ErroConsulta(f"O filtro {campo}= está sem valor.")
+    return Campo(normalizar(campo), valor, prefixo)
+
+# Função para montar o termo ou a frase correspondente a um texto da consulta
+def montar_folha(texto):
+    prefixo = texto.endswith("*")
+    palavras = PADRAO_TERMO.findall(normalizar(texto))
+    if not palavras:
+        raise ErroConsulta(f"O termo '{texto}' não tem letras nem números.")
+    if len(palavras) == 1:
+        return Termo(palavras[0], prefixo)
+    # Texto com pontuação entre as palavras (ou uma frase entre aspas): as palavras em sequência
+    return Frase([Termo(palavra) for palavra in palavras[:-1]] + [Termo(palavras[-1], prefixo)])
+
+
+# Classe que analisa a consulta (descida recursiva), da menor para a maior precedência:
+# OR, AND (explícito ou implícito entre termos), NOT, NEAR/n e, por fim, termos, frases e parênteses
+class Analisador:
+    def __init__(self, texto):
+        self.tokens = separar_tokens(texto)
+        self.posicao = 0
+
+    def proximo(self):
+        return self.tokens[self.posicao][0] if self.posicao < len(self.tokens) else None
+
+    def consumir(self):
+        token = self.tokens[self.posicao]
+        self.posicao += 1
+        return token
+
+    def analisar(self):
+        if not self.tokens:
+            raise ErroConsulta("Consulta vazia.")
+        arvore = self.ou()
+        if self.proximo() is not None:
+            raise ErroConsulta("Parêntese fechado sem ter sido aberto.")
+        verificar_campos(arvore)
+        return arvore
+
+    def ou(self):
+        filhos = [self.e()]
+        while self.proximo() == "OR":
+            self.consumir()
+            filhos.append(self.e())
+        return filhos[0] if len(filhos) == 1 else Ou(filhos)
+
+    def e(self):
+        filhos = [self.nao()]
+        while self.proximo() in ("AND", "NOT", "(", "frase", "palavra", "campo"):
+            if self.proximo() == "AND":
+                self.consumir()
+            filhos.append(self.nao())
+        return filhos[0] if len(filhos) == 1 else E(filhos)
+
+    def nao(self):
+        if self.proximo() == "NOT":
+            self.consumir()
+            return Nao(self.nao())
+        return self.perto()
+
+    def perto(self):
+        arvore = self.primario()
+        while self.proximo() == "NEAR":
+            distancia = self.consumir()[1]
+            direita = self.primario()
+            if not all(isinstance(lado, (Termo, Frase, Perto)) for lado in (arvore, direita)):
+                raise ErroConsulta("NEAR/n só pode ligar termos ou frases.")
+            arvore = Perto(arvore, direita, distancia)
+        return arvore
+
+    def primario(self):
+        tipo = self.proximo()
+        if tipo is None:
+            raise ErroConsulta("A consulta termina com um operador sem termo.")
+        tipo, valor = self.consumir()
+        if tipo == "(":
+            arvore = self.ou()
+            if self.proximo() != ")":
+                raise ErroConsulta("Parêntese aberto sem fechamento.")
+            self.consumir()
+            return arvore
+        if tipo in ("frase", "palavra"):
+            return montar_folha(valor)
+        if tipo == "campo":
+            return montar_campo(*valor)
+        raise ErroConsulta(f"Operador {tipo} fora de lugar.")
+
+
+# Consultas já analisadas em cada processo, para não analisá-las a cada arquivo
+consultas_analisadas = {}
+
+def analisar_consulta(texto):
+    if texto not in consultas_analisadas:
+        if len(consultas_analisadas) > 64:
+            consultas_analisadas.clear()
+        consultas_analisadas[texto] = Analisador(texto).analisar()
+    return consultas_analisadas[texto]
+
+# Função para conferir a sintaxe das consultas avançadas antes de começar a busca
+def validar_consultas(textos):
+    for texto in textos:
+        if eh_consulta_avancada(texto):
+            analisar_consulta(texto)
+
+
+# Função para responder uma consulta pelo índice, restrita aos candidatos (se houver).
+# Consultas simples mantêm a busca por trecho do índice; retorna None quando o índice não responde.
+def buscar_consulta_no_indice(indice, texto, candidatos=None):
+    if not eh_consulta_avancada(texto):
+        return indice.buscar(texto)
+    return analisar_consulta(texto).avaliar_indice(indice, candidatos)
+
+# Função para avaliar várias consultas sobre os parágrafos (já normalizados) de um documento.
+# As posições dos termos são montadas uma única vez e servem para todas as consultas avançadas;
+# as simples são procuradas juntas no texto, como na segunda busca.
+def avaliar_consultas(paragrafos, consultas):
+    presenca = [False] * len(consultas)
+    simples = [i for i, texto in enumerate(consultas) if not eh_consulta_avancada(texto)]
+    if simples:
+        automato = obter_automato([normalizar(consultas[i]) for i in simples])
+        for i, achou in zip(simples, automato.presenca(paragrafos)):
+            presenca[i] = achou
+    if len(simples) < len(consultas):
+        with perfil.medir_etapa("termos"):
+            termos = extrair_termos(paragrafos)
+        for i, texto in enumerate(consultas):
+            if i not in simples:
+                presenca[i] = analisar_consulta(texto).avaliar_documento(termos)
+    return presenca
+
+# Função executada nos processos da varredura: extrai o texto de um arquivo .docx uma única vez
+# e avalia todas as consultas. O texto e o mapa de trigramas voltam junto para o cache.
+def avaliar_consultas_docx(arquivo, consultas):
+    paragrafos, mapa = ler_documento(arquivo)
+    with perfil.medir_etapa("comparacao"):
+        return paragrafos, mapa, avaliar_consultas(paragrafos, consultas)
+
+# Função para saber se a consulta tem só filtros por campo, sem nada a procurar no conteúdo
+def so_filtros(arvore):
+    return len(filtros_de_campo(arvore)) == len(getattr(arvore, "filhos", [arvore]))
+
+# Função para montar o teste de uma consulta sobre o mapa de trigramas de um documento:
+# False quando o mapa prova que o documento não atende. Nas consultas simples (trecho), cada
+# palavra do trecho é parte de uma palavra do documento, então os trigramas dela estão no mapa.
+def teste_de_mapa(texto):
+    if eh_consulta_avancada(texto):
+        return analisar_consulta(texto).admite
+    codigos = codigos_trigramas(normalizar(texto).split())
+    return lambda mapa: pode_conter(mapa, codigos)
+
+# Função para avaliar as consultas nos arquivos (ou no texto já em cache), devolvendo
+# (arquivo, [atende por consulta]) à medida que cada arquivo termina. Os arquivos podem vir
+# de uma lista ou de um gerador. Os filtros por campo são aplicados antes, e os mapas de
+# trigramas guardados no cache na busca anterior descartam os documentos que com certeza não
+# têm os termos: arquivos que não podem atender a nenhuma consulta não são lidos.
+def varrer_consultas_nos_arquivos(pasta, arquivos, consultas, cache=cache_textos, catalogo=None,
+                                  progress_callback=None, cancelamento=None, **opcoes_varredura):
+    consultas = tuple(consultas)
+    validar_consultas(consultas)
+    filtros = {}
+    for i, texto in enumerate(consultas):
+        atende = filtro_de_arquivos(texto, catalogo)
+        if atende:
+            filtros[i] = atende
+    sem_conteudo = [i for i in filtros if so_filtros(analisar_consulta(consultas[i]))]
+    com_conteudo = [i for i in range(len(consultas)) if i not in sem_conteudo]
+    testes = {i: teste_de_mapa(consultas[i]) for i in com_conteudo}
+
+    def avaliar(paragrafos):
+        with perfil.medir_etapa("comparacao"):
+            return avaliar_consultas(paragrafos, consultas)
+
+    sem_leitura = deque()  # Arquivos respondidos sem leitura, ainda não devolvidos
+
+    # Separa, à medida que chegam, os arquivos que precisam ser lidos
+    def para_ler():
+        for arquivo in arquivos:
+            aceitas = [i not in filtros or filtros[i](arquivo) for i in range(len(consultas))]
+            if any(aceitas[i] for i in com_conteudo):
+                mapa = cache.obter_mapa(os.path.join(pasta, arquivo))
+                if mapa is not None:
+                    for i, teste in testes.items():
+                        if aceitas[i] and not teste(mapa):
+                            aceitas[i] = False
+            if any(aceitas[i] for i in com_conteudo):
+                yield arquivo
+            elif any(aceitas):
+                # Consultas que são só filtros não precisam do conteúdo dos documentos
+                sem_leitura.append((arquivo, aceitas))
+
+    def resultados():
+        varredura = varrer_com_cache(
+            pasta, para_ler(), avaliar, avaliar_consultas_docx, (consultas,), cache=cache,
+            progress_callback=progress_callback, cancelamento=cancelamento, **opcoes_varredura
+        )
+        for arquivo, presenca in varredura:
+            while sem_leitura:
+                yield sem_leitura.popleft()
+            yield arquivo, [
+                (i in sem_conteudo or achou) and (i not in filtros or filtros[i](arquivo))
+                for i, achou in enumerate(presenca)
+            ]
+        while sem_leitura:
+            yield sem_leitura.popleft()
+
+    return resultados()
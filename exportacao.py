@@ -0,0 +1,112 @@
+import csv
+from itertools import islice
+from xml.sax.saxutils import escape
+
+# Quantidade de linhas montadas e gravadas de cada vez; a tabela inteira nunca é montada na memória
+TAMANHO_BLOCO_EXPORTACAO = 1000
+
+# Partes fixas de um pacote .xlsx com uma única planilha
+PARTES_XLSX = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Resultados" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+INICIO_PLANILHA = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+FIM_PLANILHA = '</sheetData></worksheet>'
+
+
+# Função para gerar as linhas da tabela de resultados (arquivo, colunas fixas e Sim/Não por
+# termo), na ordem das linhas informadas (por exemplo, a ordem e o filtro da tela)
+def linhas_da_tabela(resultados, linhas=None):
+    if linhas is None:
+        linhas = range(len(resultados))
+    colunas = range(len(resultados.cabecalhos()))
+    yield ["Arquivo"] + resultados.cabecalhos()
+    for linha in linhas:
+        yield [resultados.arquivos[linha]] + [resultados.valor(linha, coluna) for coluna in colunas]
+
+# Função para separar as linhas em blocos de tamanho_bloco
+def em_blocos(linhas, tamanho_bloco):
+    iterador = iter(linhas)
+    return iter(lambda: list(islice(iterador, tamanho_bloco)), [])
+
+# Função para exportar a tabela de resultados em CSV, gravando um bloco de linhas por vez.
+# O BOM do utf-8-sig faz o Excel reconhecer os acentos.
+def exportar_csv(caminho, resultados, linhas=None, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    with open(caminho, "w", newline="", encoding="utf-8-sig") as f:
+        escritor = csv.writer(f)
+        for bloco in em_blocos(linhas_da_tabela(resultados, linhas), tamanho_bloco):
+            escritor.writerows(bloco)
+
+# Função para obter a letra da coluna da planilha (0 -> A, 25 -> Z, 26 -> AA)
+def letra_coluna(indice):
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(ord("A") + resto) + letras
+    return letras
+
+# Função para montar o XML de uma linha da planilha, com todas as células como texto
+# (os códigos mantêm os zeros à esquerda)
+def linha_xlsx(numero, valores):
+    celulas = "".join(
+        f'<c r="{letra_coluna(coluna)}{numero}" t="inlineStr"><is><t xml:space="preserve">{escape(valor)}</t></is></c>'
+        for coluna, valor in enumerate(valores)
+    )
+    return f'<row r="{numero}">{celulas}</row>'
+
+# Função para exportar a tabela de resultados em .xlsx sem depender de bibliotecas externas:
+# a planilha é escrita em fluxo direto no pacote zip, um bloco de linhas por vez
+def exportar_xlsx(caminho, resultados, linhas=None, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    import zipfile
+    with zipfile.ZipFile(caminho, "w", zipfile.ZIP_DEFLATED) as pacote:
+        for nome, conteudo in PARTES_XLSX.items():
+            pacote.writestr(nome, conteudo)
+        with pacote.open("xl/worksheets/sheet1.xml", "w") as planilha:
+            planilha.write(INICIO_PLANILHA.encode("utf-8"))
+            numero = 1
+            for bloco in em_blocos(linhas_da_tabela(resultados, linhas), tamanho_bloco):
+                planilha.write("".join(linha_xlsx(numero + i, valores) for i, valores in enumerate(bloco)).encode("utf-8"))
+                numero += len(bloco)
+            planilha.write(FIM_PLANILHA.encode("utf-8"))
+
+# Formatos de exportação, pela extensão do arquivo
+EXPORTADORES = {
+    ".csv": exportar_csv,
+    ".xlsx": exportar_xlsx,
+}
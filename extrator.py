@@ -0,0 +1,202 @@
+import math
+
+import perfil
+from normalizacao import normalizar
+from varredura import ArquivoIgnorado
+
+# Backends de extração disponíveis: "xml" lê o XML direto do pacote, em fluxo, incluindo
+# tabelas, cabeçalhos, rodapés, notas e caixas de texto; "python-docx" monta o modelo
+# completo do documento com Document() e considera só os parágrafos do corpo
+BACKEND_PADRAO = "xml"
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+TAMANHO_BLOCO_XML = 64 * 1024
+
+# Máximo de XML descompactado lido de um documento (bytes). Como o texto extraído nunca é maior
+# que o XML de onde sai, esse limite também limita a memória que cada processo usa com um
+# documento; acima dele o arquivo é ignorado na varredura, e não derruba o processo.
+LIMITE_XML_PADRAO = 128 * 1024 * 1024
+
+
+# Função para descrever um tamanho em bytes em MB ou KB, com uma casa decimal arredondada para
+# cima (um limite abaixo de 1 MB não aparece como "0 MB")
+def descrever_tamanho(tamanho):
+    for unidade, bytes_unidade in (("MB", 1024 * 1024), ("KB", 1024)):
+        if tamanho >= bytes_unidade:
+            return f"{math.ceil(tamanho * 10 / bytes_unidade) / 10:g} {unidade}"
+    return f"{tamanho} bytes"
+
+
+# Exceção levantada para um documento com mais texto do que o limite
+class ArquivoGrandeDemais(ArquivoIgnorado):
+    tipo = "grande demais"
+
+    def __init__(self, limite):
+        super().__init__(f"mais de {descrever_tamanho(limite)} de texto descompactado")
+        self.limite = limite
+
+    def __reduce__(self):
+        return ArquivoGrandeDemais, (self.limite,)
+
+
+# Função para conferir, antes de ler, o tamanho descompactado declarado das partes do pacote
+def verificar_tamanho(pacote, partes, limite):
+    tamanhos = {info.filename: info.file_size for info in pacote.infolist()}
+    if sum(tamanhos.get(parte, 0) for parte in partes) > limite:
+        raise ArquivoGrandeDemais(limite)
+
+
+# Função para extrair o texto dos parágrafos de um arquivo .docx com o python-docx. O
+# Document() carrega o pacote inteiro na memória (imagens incluídas), por isso o limite
+# vale para a soma de todas as partes.
+def extrair_paragrafos_python_docx(arquivo, limite=LIMITE_XML_PADRAO):
+    import zipfile
+    from docx import Document
+    with zipfile.ZipFile(arquivo) as pacote:
+        verificar_tamanho(pacote, pacote.namelist(), limite)
+    doc = Document(arquivo)
+    for paragrafo in doc.paragraphs:
+        yield paragrafo.text
+
+# Tipos de conteúdo das partes do pacote que têm texto do documento, na ordem em que são lidas:
+# corpo (incluindo tabelas e caixas de texto), cabeçalhos, rodapés, notas de rodapé e notas de fim
+TIPOS_PARTES_TEXTO = [".main+xml", ".header+xml", ".footer+xml", ".footnotes+xml", ".endnotes+xml"]
+
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+CT = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+
+# Elementos que guardam o conteúdo de cada parte (parágrafos, tabelas, notas); os filhos
+# já lidos são desligados deles durante a leitura
+RECIPIENTES = {W + "body", W + "hdr", W + "ftr", W + "footnotes", W + "endnotes"}
+
+
+# Função para listar as partes do pacote com texto, a partir do [Content_Types].xml
+def listar_partes_texto(pacote):
+    import xml.etree.ElementTree as ET
+    try:
+        tipos = ET.fromstring(pacote.read("[Content_Types].xml"))
+    except (KeyError, ET.ParseError):
+        return ["word/document.xml"]
+
+    partes = []
+    for ordem, sufixo in enumerate(TIPOS_PARTES_TEXTO):
+        for substituicao in tipos.iter(CT + "Override"):
+            tipo = substituicao.get("ContentType", "")
+            if ("wordprocessingml" in tipo or "ms-word" in tipo) and tipo.endswith(sufixo):
+                partes.append(substituicao.get("PartName", "").lstrip("/"))
+    return sorted(partes, key=lambda parte: parte != "word/document.xml") or ["word/document.xml"]
+
+# Função para medir o tempo de leitura de uma parte do pacote (disco e descompactação)
+def medir_leitura(ler):
+    def ler_medindo(tamanho):
+        with perfil.medir_etapa("descompactacao"):
+            return ler(tamanho)
+    return ler_medindo
+
+# Função para extrair, em fluxo, o texto de todos os parágrafos de uma parte XML do pacote.
+# Parágrafos dentro de outros (caixas de texto) são devolvidos separadamente, e o conteúdo
+# alternativo (mc:Fallback), que repete as caixas de texto em outro formato, é ignorado.
+# Lê no máximo limite bytes descompactados e retorna a quantidade lida.
+def extrair_paragrafos_parte(fluxo, limite=LIMITE_XML_PADRAO):
+    import xml.etree.ElementTree as ET
+    parser = ET.XMLPullParser(events=("start", "end"))
+    abertos = []  # Parágrafos em leitura, do mais externo ao mais interno: [partes, runs abertos]
+    alternativos = 0
+    lidos = 0
+    profundidade = 0
+    recipiente, nivel_recipiente = None, -1
+
+    ler = medir_leitura(fluxo.read) if perfil.esta_ativo() else fluxo.read
+    for bloco in iter(lambda: ler(TAMANHO_BLOCO_XML), b""):
+        # O tamanho declarado no zip pode não ser o real: a contagem vale durante a leitura
+        lidos += len(bloco)
+        if lidos > limite:
+            raise ArquivoGrandeDemais(limite)
+        parser.feed(bloco)
+        for evento, elemento in parser.read_events():
+            tag = elemento.tag
+            if evento == "start":
+                profundidade += 1
+                if tag in RECIPIENTES:
+                    recipiente, nivel_recipiente = elemento, profundidade
+                if tag == MC + "Fallback":
+                    alternativos += 1
+                elif alternativos:
+                    continue
+                elif tag == W + "p":
+                    abertos.append([[], 0])
+                elif tag == W + "r" and abertos:
+                    abertos[-1][1] += 1
+                continue
+
+            if tag == MC + "Fallback":
+                alternativos -= 1
+            elif alternativos:
+                pass
+            elif tag == W + "p":
+                yield "".join(abertos.pop()[0])
+            elif tag == W + "r" and abertos:
+                abertos[-1][1] -= 1
+            elif abertos and abertos[-1][1]:
+                # Mesmo texto que o python-docx monta para cada run do parágrafo
+                partes = abertos[-1][0]
+                if tag == W + "t":
+                    partes.append(elemento.text or "")
+                elif tag in (W + "tab", W + "ptab"):
+                    partes.append("\t")
+                elif tag == W + "cr":
+                    partes.append("\n")
+                elif tag == W + "br" and elemento.get(W + "type", "textWrapping") == "textWrapping":
+                    partes.append("\n")
+                elif tag == W + "noBreakHyphen":
+                    partes.append("-")
+
+            # Descarta cada elemento já processado para manter a memória constante. Os
+            # elementos limpos continuariam presos ao recipiente (w:body, por exemplo), que
+            # cresceria com o documento; os filhos dele saem assim que terminam.
+            elemento.clear()
+            profundidade -= 1
+            if profundidade == nivel_recipiente:
+                del recipiente[:]
+    return lidos
+
+# Função para extrair o texto dos parágrafos de um arquivo .docx lendo o XML do pacote em fluxo.
+# Cobre o documento inteiro (corpo, tabelas, caixas de texto, cabeçalhos, rodapés e notas) em
+# uma única leitura de cada parte, começando pelo corpo; cada parágrafo é devolvido assim que
+# termina de ser lido, sem carregar o documento inteiro na memória. As outras partes do
+# pacote (imagens e objetos incorporados) nunca são lidas. Um documento com mais de limite
+# bytes de XML de texto levanta ArquivoGrandeDemais.
+def extrair_paragrafos_xml(arquivo, limite=LIMITE_XML_PADRAO):
+    import zipfile
+    with perfil.medir_etapa("abertura_zip"):
+        pacote = zipfile.ZipFile(arquivo)
+    with pacote:
+        partes = listar_partes_texto(pacote)
+        verificar_tamanho(pacote, partes, limite)
+        restante = limite
+        for parte in partes:
+            try:
+                fluxo = pacote.open(parte)
+            except KeyError:
+                continue
+            with fluxo:
+                restante -= yield from extrair_paragrafos_parte(fluxo, restante)
+
+EXTRATORES = {
+    "xml": extrair_paragrafos_xml,
+    "python-docx": extrair_paragrafos_python_docx,
+}
+
+# Função para extrair o texto dos parágrafos de um arquivo .docx com o backend escolhido
+def extrair_paragrafos_docx(arquivo, backend=BACKEND_PADRAO, limite=LIMITE_XML_PADRAO):
+    return EXTRATORES[backend](arquivo, limite)
+
+# Função para buscar uma palavra em um arquivo .docx. A leitura para no primeiro
+# parágrafo que contém a palavra, sem extrair o resto do documento. Um arquivo que não
+# pode ser lido levanta a exceção, para não ser confundido com um arquivo sem a palavra.
+def buscar_palavra_em_docx(arquivo, palavra, backend=BACKEND_PADRAO):
+    palavra = normalizar(palavra)
+    for texto in extrair_paragrafos_docx(arquivo, backend):
+        if palavra in normalizar(texto):
+            return True
+    return False
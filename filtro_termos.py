@@ -0,0 +1,53 @@
+import zlib
+
+# Tamanho (em bits) do mapa de cada documento: cerca de 8 bits por trigrama distinto, em
+# potência de 2 e entre os limites. Documentos muito grandes ficam com o mapa mais cheio e
+# descartam menos, mas nunca ocupam mais que BITS_MAXIMO / 8 bytes.
+BITS_POR_TRIGRAMA = 8
+BITS_MINIMO = 512
+BITS_MAXIMO = 32768
+
+
+# Função para obter os trigramas (trechos de 3 caracteres) de cada palavra de um texto
+# normalizado. Os trigramas não atravessam espaços: qualquer trecho de uma palavra do
+# documento com 3 ou mais caracteres tem todos os seus trigramas nessa palavra.
+def trigramas(palavras):
+    encontrados = set()
+    for palavra in palavras:
+        encontrados.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return encontrados
+
+# Função para calcular os códigos dos trigramas; zlib.crc32 dá o mesmo valor em qualquer
+# processo (o hash() do Python muda a cada execução)
+def codigos_trigramas(palavras):
+    return [zlib.crc32(trigrama.encode("utf-8")) for trigrama in trigramas(palavras)]
+
+# Função para montar o mapa de trigramas de um documento (parágrafos já normalizados): um
+# bit ligado para o código de cada trigrama, como um filtro de Bloom de uma função só.
+# Um bit desligado prova que o trigrama não está no documento.
+def montar_mapa(paragrafos):
+    palavras = set()
+    for texto in paragrafos:
+        palavras.update(texto.split())
+    codigos = codigos_trigramas(palavra for palavra in palavras if len(palavra) >= 3)
+    bits = BITS_MINIMO
+    while bits < len(codigos) * BITS_POR_TRIGRAMA and bits < BITS_MAXIMO:
+        bits *= 2
+    mapa = bytearray(bits // 8)
+    mascara = bits - 1
+    for codigo in codigos:
+        codigo &= mascara
+        mapa[codigo >> 3] |= 1 << (codigo & 7)
+    return bytes(mapa)
+
+# Função para saber se um documento pode conter um texto (já normalizado): False quando algum
+# trigrama do texto com certeza não está no mapa. Textos sem trigramas (palavras de até 2
+# letras) não descartam nada. Os códigos do texto podem ser calculados uma vez, com
+# codigos_trigramas, e usados para todos os documentos.
+def pode_conter(mapa, codigos):
+    mascara = len(mapa) * 8 - 1
+    for codigo in codigos:
+        codigo &= mascara
+        if not mapa[codigo >> 3] & (1 << (codigo & 7)):
+            return False
+    return True
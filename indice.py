@@ -0,0 +1,359 @@
+import hashlib
+import os
+import pathlib
+import re
+import sqlite3
+import perfil
+from extrator import extrair_paragrafos_docx
+from normalizacao import normalizar
+from varredura import NUM_PROCESSOS_PADRAO, TAMANHO_LOTE_PADRAO, ErroAcesso, avisar_ignorado, varrer_em_paralelo
+
+NOME_ARQUIVO_INDICE = ".busca_indice.sqlite"
+# Versão do índice; muda quando o formato ou o texto extraído de cada documento muda,
+# para que índices antigos sejam refeitos (3: texto de tabelas, cabeçalhos, rodapés e notas;
+# 4: termos sem acentos; 5: quebras entre termos)
+VERSAO_ESQUEMA = 5
+
+# Expressões usadas para quebrar o texto em termos e validar consultas
+PADRAO_TERMO = re.compile(r"\w+")
+PADRAO_CONSULTA_SIMPLES = re.compile(r"^\w+(?: \w+)*$")
+
+# Intervalo de posições entre parágrafos, para que uma frase nunca
+# seja encontrada atravessando dois parágrafos diferentes
+SALTO_ENTRE_PARAGRAFOS = 2
+
+# Quantidade de arquivos extraídos entre gravações do índice, para que uma
+# atualização interrompida não perca o que já foi feito
+INTERVALO_GRAVACAO = 200
+
+
+# Função para obter o caminho do arquivo de índice de uma pasta
+def caminho_indice(pasta):
+    return os.path.join(pasta, NOME_ARQUIVO_INDICE)
+
+# Função para calcular a impressão digital (hash do conteúdo) de um arquivo
+def calcular_hash(arquivo):
+    hash_arquivo = hashlib.sha1()
+    with open(arquivo, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            hash_arquivo.update(bloco)
+    return hash_arquivo.hexdigest()
+
+# Função para quebrar os parágrafos (já normalizados) em termos com suas posições no documento
+def extrair_termos(paragrafos):
+    termos = {}
+    posicao = 0
+    for texto in paragrafos:
+        for termo in PADRAO_TERMO.findall(texto):
+            termos.setdefault(termo, []).append(posicao)
+            posicao += 1
+        posicao += SALTO_ENTRE_PARAGRAFOS
+    return termos
+
+# Função para obter as posições dos termos seguidos, no mesmo parágrafo, por algo além de um
+# espaço (pontuação, por exemplo). Os termos de extrair_termos ignoram a pontuação; com as
+# quebras, "contrato social" não é encontrado no índice em "contrato, social", como na varredura.
+def extrair_quebras(paragrafos):
+    quebras = []
+    posicao = 0
+    for texto in paragrafos:
+        fim_anterior = None
+        for ocorrencia in PADRAO_TERMO.finditer(texto):
+            if fim_anterior is not None and texto[fim_anterior:ocorrencia.start()] != " ":
+                quebras.append(posicao - 1)
+            fim_anterior = ocorrencia.end()
+            posicao += 1
+        posicao += SALTO_ENTRE_PARAGRAFOS
+    return quebras
+
+# Função executada nos processos da varredura: extrai os termos e as quebras de um arquivo .docx
+def extrair_termos_docx(arquivo):
+    with perfil.medir_etapa("extracao"):
+        paragrafos = [normalizar(texto) for texto in extrair_paragrafos_docx(arquivo)]
+    with perfil.medir_etapa("termos"):
+        return extrair_termos(paragrafos), extrair_quebras(paragrafos)
+
+
+# Classe que mantém o índice invertido (termo -> arquivos e posições) de uma pasta
+class IndicePalavras:
+    # Somente leitura: o arquivo não é criado nem alterado (nem o diário do SQLite), o que
+    # não gera avisos no monitoramento da pasta; um índice ausente ou de outra versão levanta
+    # sqlite3.Error
+    def __init__(self, pasta, caminho=None, somente_leitura=False):
+        self.pasta = pasta
+        self.caminho = caminho or caminho_indice(pasta)
+        if somente_leitura:
+            uri = pathlib.Path(os.path.abspath(self.caminho)).as_uri() + "?mode=ro"
+            self.conexao = sqlite3.connect(uri, uri=True)
+            if self.versao() != VERSAO_ESQUEMA:
+                self.conexao.close()
+                raise sqlite3.DatabaseError(f"O índice {self.caminho} é de outra versão.")
+        else:
+            self.conexao = sqlite3.connect(self.caminho)
+            self.criar_tabelas()
+
+    def versao(self):
+        return self.conexao.execute("PRAGMA user_version").fetchone()[0]
+
+    def criar_tabelas(self):
+        # Só escreve no arquivo quando o índice é novo ou de uma versão anterior (que é
+        # recriado); abrir um índice em dia não o altera
+        if self.versao() == VERSAO_ESQUEMA:
+            return
+        self.conexao.executescript(f"""
+            DROP TABLE IF EXISTS ocorrencias;
+            DROP TABLE IF EXISTS termos;
+            DROP TABLE IF EXISTS arquivos;
+            CREATE TABLE IF NOT EXISTS arquivos (
+                id INTEGER PRIMARY KEY,
+                nome TEXT UNIQUE NOT NULL,
+                mtime REAL NOT NULL,
+                tamanho INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                quebras TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS termos (
+                id INTEGER PRIMARY KEY,
+                termo TEXT UNIQUE NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS ocorrencias (
+                termo_id INTEGER NOT NULL,
+                arquivo_id INTEGER NOT NULL,
+                posicoes TEXT NOT NULL,
+                PRIMARY KEY (termo_id, arquivo_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS ocorrencias_arquivo ON ocorrencias (arquivo_id);
+            CREATE INDEX IF NOT EXISTS arquivos_hash ON arquivos (hash);
+            PRAGMA user_version = {VERSAO_ESQUEMA};
+        """)
+        self.conexao.commit()
+
+    def fechar(self):
+        self.conexao.close()
+
+    def arquivos_indexados(self):
+        return {nome for (nome,) in self.conexao.execute("SELECT nome FROM arquivos")}
+
+    # Data de modificação e tamanho guardados de cada arquivo cujo nome começa com o prefixo
+    # (uma subpasta, por exemplo): {nome: (mtime, tamanho)}
+    def estado_arquivos(self, prefixo=""):
+        linhas = self.conexao.execute(
+            "SELECT nome, mtime, tamanho FROM arquivos WHERE substr(nome, 1, ?) = ?", (len(prefixo), prefixo)
+        )
+        return {nome: (mtime, tamanho) for nome, mtime, tamanho in linhas}
+
+    # Atualiza o índice comparando a lista atual de arquivos com as impressões digitais
+    # guardadas (mtime, tamanho e hash). Só os arquivos novos ou alterados são extraídos
+    # de novo; arquivos apagados saem do índice e arquivos renomeados só mudam de nome.
+    # Os arquivos podem vir de uma lista ou de um gerador. Com removidos (atualização parcial,
+    # pelo monitoramento da pasta), arquivos é só uma parte da pasta: saem do índice apenas os
+    # removidos que não foram renomeados. Retorna a quantidade de arquivos extraídos.
+    def atualizar(self, arquivos, progress_callback=None, num_processos=NUM_PROCESSOS_PADRAO,
+                  tamanho_lote=TAMANHO_LOTE_PADRAO, cancelamento=None, ignorado_callback=None, quarentena=None,
+                  removidos=None):
+        guardados = {
+            nome: (arquivo_id, mtime, tamanho, hash_arquivo)
+            for arquivo_id, nome, mtime, tamanho, hash_arquivo
+            in self.conexao.execute("SELECT id, nome, mtime, tamanho, hash FROM arquivos")
+        }
+        # Nomes guardados cujo arquivo não existe mais: candidatos a renomeação (hash -> nome)
+        ausentes = {
+            guardados[nome][3]: nome for nome in (guardados if removidos is None else removidos)
+            if nome in guardados and not os.path.exists(os.path.join(self.pasta, nome))
+        }
+        vistos = set()
+        para_extrair = {}
+
+        # Primeiro passo: separa os arquivos que precisam ser extraídos. É um gerador, para
+        # que a extração comece enquanto a listagem da pasta (lista ou gerador) ainda anda.
+        def alterados():
+            for arquivo in arquivos:
+                if cancelamento and cancelamento.is_set():
+                    return
+                vistos.add(arquivo)
+                # Arquivo apagado depois da listagem, link quebrado ou sem permissão: é
+                # ignorado como os que falham na extração, sem interromper a atualização
+                try:
+                    estado = os.stat(os.path.join(self.pasta, arquivo))
+                    guardado = guardados.get(arquivo)
+                    if guardado and guardado[1] == estado.st_mtime and guardado[2] == estado.st_size:
+                        continue
+                    hash_arquivo = calcular_hash(os.path.join(self.pasta, arquivo))
+                except OSError as e:
+                    ignorar(arquivo, ErroAcesso(f"{type(e).__name__}: {e}"))
+                    continue
+                if guardado and guardado[3] == hash_arquivo:
+                    # Apenas a data mudou (arquivo salvo sem alterações)
+                    self.conexao.execute(
+                        "UPDATE arquivos SET mtime = ?, tamanho = ? WHERE id = ?",
+                        (estado.st_mtime, estado.st_size, guardado[0])
+                    )
+                elif not guardado and hash_arquivo in ausentes:
+                    # Arquivo renomeado: reaproveita os termos já indexados
+                    nome_antigo = ausentes.pop(hash_arquivo)
+                    vistos.add(nome_antigo)
+                    self.conexao.execute(
+                        "UPDATE arquivos SET nome = ?, mtime = ?, tamanho = ? WHERE nome = ?",
+                        (arquivo, estado.st_mtime, estado.st_size, nome_antigo)
+                    )
+                else:
+                    para_extrair[arquivo] = (estado, hash_arquivo)
+                    yield arquivo
+
+        # Segundo passo: extrai os arquivos alterados em paralelo, gravando na ordem em que terminam
+        ids_termos = {}
+        # Um arquivo ignorado (com erro ou grande demais) não fica no índice com os termos de
+        # uma versão antiga
+        def ignorar(arquivo, erro):
+            para_extrair.pop(arquivo, None)
+            self.remover_arquivo(arquivo)
+            avisar_ignorado(self.pasta, arquivo, erro, ignorado_callback)
+
+        resultados = varrer_em_paralelo(
+            self.pasta, alterados(), extrair_termos_docx,
+            num_processos=num_processos, tamanho_lote=tamanho_lote,
+            progress_callback=progress_callback, cancelamento=cancelamento, ignorado_callback=ignorar,
+            quarentena=quarentena
+        )
+        extraidos = 0
+        for arquivo, (termos, quebras) in resultados:
+            estado, hash_arquivo = para_extrair.pop(arquivo)
+            self.remover_arquivo(arquivo)
+            self.adicionar_arquivo(arquivo, estado, hash_arquivo, termos, quebras, ids_termos)
+            extraidos += 1
+            if extraidos % INTERVALO_GRAVACAO == 0:
+                self.conexao.commit()
+
+        if cancelamento and cancelamento.is_set():
+            self.conexao.commit()
+            return extraidos
+
+        # Arquivos que sumiram da pasta (e não foram renomeados) saem do índice
+        for nome in (guardados if removidos is None else removidos):
+            if nome not in vistos:
+                self.remover_arquivo(nome)
+
+        self.conexao.commit()
+        return extraidos
+
+    def remover_arquivo(self, arquivo):
+        linha = self.conexao.execute("SELECT id FROM arquivos WHERE nome = ?", (arquivo,)).fetchone()
+        if linha:
+            self.conexao.execute("DELETE FROM ocorrencias WHERE arquivo_id = ?", linha)
+            self.conexao.execute("DELETE FROM arquivos WHERE id = ?", linha)
+
+    def adicionar_arquivo(self, arquivo, estado, hash_arquivo, termos, quebras, ids_termos):
+        cursor = self.conexao.execute(
+            "INSERT INTO arquivos (nome, mtime, tamanho, hash, quebras) VALUES (?, ?, ?, ?, ?)",
+            (arquivo, estado.st_mtime, estado.st_size, hash_arquivo, ",".join(map(str, quebras)))
+        )
+        arquivo_id = cursor.lastrowid
+        linhas = []
+        for termo, posicoes in termos.items():
+            termo_id = ids_termos.get(termo)
+            if termo_id is None:
+                self.conexao.execute("INSERT OR IGNORE INTO termos (termo) VALUES (?)", (termo,))
+                termo_id = self.conexao.execute(
+                    "SELECT id FROM termos WHERE termo = ?", (termo,)
+                ).fetchone()[0]
+                ids_termos[termo] = termo_id
+            linhas.append((termo_id, arquivo_id, ",".join(map(str, posicoes))))
+        self.conexao.executemany(
+            "INSERT INTO ocorrencias (termo_id, arquivo_id, posicoes) VALUES (?, ?, ?)", linhas
+        )
+
+    # Busca uma palavra (ou trecho de palavras) no índice e retorna o conjunto de arquivos,
+    # mantendo a semântica de substring da busca original: as palavras precisam estar em
+    # sequência e separadas só por um espaço (sem pontuação entre elas). Retorna None quando
+    # a consulta tem pontuação e não pode ser respondida pelo índice.
+    def buscar(self, palavra):
+        consulta = normalizar(palavra).strip()
+        if not PADRAO_CONSULTA_SIMPLES.match(consulta):
+            return None
+        partes = consulta.split(" ")
+
+        if len(partes) == 1:
+            linhas = self.conexao.execute("""
+                SELECT DISTINCT a.nome FROM ocorrencias o
+                JOIN arquivos a ON a.id = o.arquivo_id
+                WHERE o.termo_id IN (SELECT id FROM termos WHERE instr(termo, ?) > 0)
+            """, (partes[0],))
+            return {nome for (nome,) in linhas}
+
+        posicoes_por_parte = [
+            self.posicoes_por_arquivo(*condicao_da_parte(parte, i, len(partes)))
+            for i, parte in enumerate(partes)
+        ]
+        candidatos = set.intersection(*(set(posicoes) for posicoes in posicoes_por_parte))
+
+        encontrados = set()
+        for arquivo in candidatos:
+            inicios = posicoes_por_parte[0][arquivo]
+            for deslocamento, posicoes in enumerate(posicoes_por_parte[1:], start=1):
+                inicios = {p for p in inicios if p + deslocamento in posicoes[arquivo]}
+                if not inicios:
+                    break
+            if inicios:
+                # Descarta as sequências com pontuação entre as palavras
+                quebras = self.quebras_do_arquivo(arquivo)
+                if any(not quebras.intersection(range(p, p + len(partes) - 1)) for p in inicios):
+                    encontrados.add(arquivo)
+        return encontrados
+
+    # Posições dos termos seguidos de pontuação no arquivo (extrair_quebras)
+    def quebras_do_arquivo(self, arquivo):
+        (texto,) = self.conexao.execute("SELECT quebras FROM arquivos WHERE nome = ?", (arquivo,)).fetchone()
+        return set(map(int, texto.split(","))) if texto else set()
+
+    # Posições dos termos que atendem à condição, por arquivo. Com candidatos, só esses
+    # arquivos são considerados (e, se forem poucos, filtrados já na consulta ao SQLite).
+    def posicoes_por_arquivo(self, condicao, parametros, candidatos=None):
+        filtro, parametros_filtro = filtro_candidatos(candidatos)
+        linhas = self.conexao.execute(f"""
+            SELECT a.nome, o.posicoes FROM ocorrencias o
+            JOIN arquivos a ON a.id = o.arquivo_id
+            WHERE o.termo_id IN (SELECT id FROM termos WHERE {condicao}){filtro}
+        """, tuple(parametros) + parametros_filtro)
+        posicoes = {}
+        for nome, texto in linhas:
+            if candidatos is None or nome in candidatos:
+                posicoes.setdefault(nome, set()).update(map(int, texto.split(",")))
+        return posicoes
+
+    def arquivos_com(self, condicao, parametros, candidatos=None):
+        filtro, parametros_filtro = filtro_candidatos(candidatos)
+        linhas = self.conexao.execute(f"""
+            SELECT DISTINCT a.nome FROM ocorrencias o
+            JOIN arquivos a ON a.id = o.arquivo_id
+            WHERE o.termo_id IN (SELECT id FROM termos WHERE {condicao}){filtro}
+        """, tuple(parametros) + parametros_filtro)
+        return {nome for (nome,) in linhas if candidatos is None or nome in candidatos}
+
+    # Quantidade de arquivos com algum termo que atende à condição, usada para estimar
+    # a seletividade de cada parte de uma consulta
+    def frequencia(self, condicao, parametros):
+        return self.conexao.execute(f"""
+            SELECT COUNT(DISTINCT arquivo_id) FROM ocorrencias
+            WHERE termo_id IN (SELECT id FROM termos WHERE {condicao})
+        """, parametros).fetchone()[0]
+
+
+# Quantidade máxima de arquivos candidatos passados diretamente na consulta SQL
+MAX_CANDIDATOS_SQL = 500
+
+# Função para montar o filtro SQL que restringe a consulta a poucos arquivos candidatos
+def filtro_candidatos(candidatos):
+    if candidatos is None or len(candidatos) > MAX_CANDIDATOS_SQL:
+        return "", ()
+    marcadores = ",".join("?" * len(candidatos))
+    return f" AND a.nome IN ({marcadores})", tuple(candidatos)
+
+
+# Função para montar a condição SQL de uma parte da consulta: a primeira parte casa com o
+# final de um termo, a última com o começo e as do meio precisam ser exatas
+def condicao_da_parte(parte, indice_parte, total_partes):
+    if indice_parte == 0:
+        return "substr(termo, -?) = ?", (len(parte), parte)
+    if indice_parte == total_partes - 1:
+        return "substr(termo, 1, ?) = ?", (len(parte), parte)
+    return "termo = ?", (parte,)
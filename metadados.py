@@ -0,0 +1,89 @@
+import os
+from collections import namedtuple
+
+from normalizacao import normalizar
+
+# Dados tirados do nome do arquivo, no padrão "CÓDIGO - EMPRESA - STATUS.docx"
+Metadados = namedtuple("Metadados", ["codigo", "empresa", "status"])
+
+# Nomes aceitos para cada campo nos filtros da consulta (já normalizados)
+CAMPOS = {"codigo": 0, "empresa": 1, "status": 2}
+
+
+# Função para interpretar o nome de um arquivo (sem a pasta); retorna None se o nome não segue o padrão
+def interpretar_nome(arquivo):
+    try:
+        codigo, empresa, status = os.path.basename(arquivo).split("-")
+    except ValueError:
+        return None
+    return Metadados(codigo.strip(), empresa.strip(), status.strip().replace(".docx", ""))
+
+
+# Classe com os metadados de todos os arquivos de uma pasta, interpretados uma única vez
+# quando a pasta é carregada, e com índices por código, empresa e status (valor normalizado
+# -> arquivos). Os filtros por campo usam esses índices para descartar arquivos antes de
+# ler o conteúdo de qualquer documento.
+class CatalogoArquivos:
+    def __init__(self):
+        self.metadados = {}  # Arquivo -> Metadados
+        self.fora_do_padrao = set()  # Arquivos cujo nome não segue o padrão
+        self.indices = [{} for _ in CAMPOS]  # Por campo: valor normalizado -> arquivos
+
+    # Atualiza o catálogo com a lista atual da pasta: só os nomes novos são interpretados.
+    # Retorna os arquivos novos com nome fora do padrão.
+    def atualizar(self, arquivos):
+        atuais = set(arquivos)
+        for arquivo in [arquivo for arquivo in self.metadados if arquivo not in atuais]:
+            self.remover(arquivo)
+        self.fora_do_padrao &= atuais
+
+        novos_fora_do_padrao = []
+        for arquivo in arquivos:
+            if self.adicionar(arquivo):
+                novos_fora_do_padrao.append(arquivo)
+        return novos_fora_do_padrao
+
+    # Acrescenta um arquivo encontrado durante a listagem da pasta, sem esperar a lista inteira.
+    # Retorna True se o arquivo é novo e o nome dele está fora do padrão.
+    def adicionar(self, arquivo):
+        if arquivo in self.metadados or arquivo in self.fora_do_padrao:
+            return False
+        dados = interpretar_nome(arquivo)
+        if dados is None:
+            self.fora_do_padrao.add(arquivo)
+            return True
+        self.metadados[arquivo] = dados
+        for indice, valor in zip(self.indices, dados):
+            indice.setdefault(normalizar(valor), set()).add(arquivo)
+        return False
+
+    def remover(self, arquivo):
+        dados = self.metadados.pop(arquivo)
+        for indice, valor in zip(self.indices, dados):
+            arquivos = indice[normalizar(valor)]
+            arquivos.discard(arquivo)
+            if not arquivos:
+                del indice[normalizar(valor)]
+
+    # Arquivos cujo campo é igual ao valor (ou começa com ele, se for prefixo)
+    def filtrar(self, campo, valor, prefixo=False):
+        indice = self.indices[CAMPOS[campo]]
+        if not prefixo:
+            return indice.get(valor, set())
+        return set().union(*(arquivos for chave, arquivos in indice.items() if chave.startswith(valor)))
+
+    # Agrupa os arquivos pelo valor de um campo: {valor: [arquivos]}
+    def agrupar(self, campo, arquivos):
+        grupos = {}
+        for arquivo in arquivos:
+            dados = self.metadados.get(arquivo)
+            if dados:
+                grupos.setdefault(dados[CAMPOS[campo]], []).append(arquivo)
+        return grupos
+
+    # Mesmo formato de criar_dicionario_arquivos, para as colunas Código, Empresa e Status
+    def dados(self, arquivo):
+        dados = self.metadados.get(arquivo)
+        if dados is None:
+            return None
+        return {"Código": dados.codigo, "Empresa": dados.empresa, "Status": dados.status}
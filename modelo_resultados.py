@@ -0,0 +1,197 @@
+from PySide6.QtCore import QAbstractProxyModel, QAbstractTableModel, QModelIndex, Qt
+
+from normalizacao import normalizar
+from resultados import ResultadosBusca
+
+
+# Modelo da tabela de resultados: a tabela só pede ao modelo as células visíveis na tela,
+# lidas direto das colunas de ResultadosBusca, sem criar um item para cada célula
+class ModeloResultados(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.resultados = ResultadosBusca()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.resultados)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.resultados.cabecalhos())
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.resultados.valor(index.row(), index.column())
+        if role == Qt.UserRole:
+            return self.resultados.arquivos[index.row()]
+        return None
+
+    def headerData(self, secao, orientacao, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientacao == Qt.Horizontal:
+            return self.resultados.cabecalhos()[secao]
+        return secao + 1
+
+    def adicionar_arquivo(self, arquivo, dados):
+        linha = len(self.resultados)
+        self.beginInsertRows(QModelIndex(), linha, linha)
+        self.resultados.adicionar(arquivo, dados["Código"], dados["Empresa"], dados["Status"])
+        self.endInsertRows()
+
+    # Acrescenta de uma vez os arquivos de um lote, [(arquivo, dados)], com um único aviso à tabela
+    def adicionar_arquivos(self, lote):
+        if not lote:
+            return
+        linha = len(self.resultados)
+        self.beginInsertRows(QModelIndex(), linha, linha + len(lote) - 1)
+        for arquivo, dados in lote:
+            self.resultados.adicionar(arquivo, dados["Código"], dados["Empresa"], dados["Status"])
+        self.endInsertRows()
+
+    # Acrescenta uma coluna Sim/Não por termo, sem refazer as linhas; retorna a primeira coluna nova
+    def adicionar_termos(self, termos):
+        primeira_coluna = self.columnCount()
+        self.beginInsertColumns(QModelIndex(), primeira_coluna, primeira_coluna + len(termos) - 1)
+        self.resultados.adicionar_termos(termos)
+        self.endInsertColumns()
+        return primeira_coluna
+
+    # Marca várias células, [(arquivo, coluna)], avisando a tabela uma única vez pela faixa
+    # que cobre todas elas
+    def marcar_varios(self, marcas, encontrado=True):
+        linhas, colunas = [], []
+        for arquivo, coluna in marcas:
+            linha = self.resultados.marcar(arquivo, coluna, encontrado)
+            if linha is not None:
+                linhas.append(linha)
+                colunas.append(coluna)
+        if linhas:
+            self.dataChanged.emit(self.index(min(linhas), min(colunas)), self.index(max(linhas), max(colunas)))
+
+    def limpar(self):
+        self.beginResetModel()
+        self.resultados.limpar()
+        self.endResetModel()
+
+    # Retira arquivos da tabela. As linhas mudam de número, então a tabela é refeita (o proxy
+    # mantém a ordenação e o filtro); é raro, só quando a pasta monitorada muda
+    def remover_arquivos(self, arquivos):
+        if not any(arquivo in self.resultados.linhas for arquivo in arquivos):
+            return
+        self.beginResetModel()
+        self.resultados.remover(set(arquivos))
+        self.endResetModel()
+
+    # Troca todos os resultados de uma vez (sessão gravada aberta de novo)
+    def carregar(self, resultados):
+        self.beginResetModel()
+        self.resultados = resultados
+        self.endResetModel()
+
+
+# Proxy que ordena e filtra a tabela. A ordem é calculada em Python sobre as colunas de
+# ResultadosBusca (uma chave por linha), em vez de comparar célula a célula pelo modelo,
+# o que fica lento com dezenas de milhares de linhas. Linhas inseridas durante a busca
+# entram no final, até a próxima ordenação.
+class ProxyResultados(QAbstractProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.linhas = []  # Linhas do modelo de origem, na ordem exibida
+        self.posicoes = {}  # Linha do modelo de origem -> linha exibida
+        self.filtro = ""
+        self.ordenacao = None  # (coluna, ordem) da última ordenação
+
+    def setSourceModel(self, modelo):
+        super().setSourceModel(modelo)
+        modelo.modelReset.connect(self.reconstruir)
+        modelo.rowsInserted.connect(self.inserir_linhas)
+        modelo.columnsAboutToBeInserted.connect(
+            lambda parent, primeira, ultima: self.beginInsertColumns(QModelIndex(), primeira, ultima)
+        )
+        modelo.columnsInserted.connect(self.endInsertColumns)
+        modelo.dataChanged.connect(self.repassar_mudanca)
+        self.reconstruir()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+
+    def index(self, linha, coluna, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= linha < len(self.linhas)) or not (0 <= coluna < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(linha, coluna)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self.linhas[index.row()], index.column())
+
+    def mapFromSource(self, index):
+        linha = self.posicoes.get(index.row()) if index.isValid() else None
+        return QModelIndex() if linha is None else self.index(linha, index.column())
+
+    def headerData(self, secao, orientacao, role=Qt.DisplayRole):
+        if orientacao == Qt.Vertical:
+            return secao + 1 if role == Qt.DisplayRole else None
+        return self.sourceModel().headerData(secao, orientacao, role)
+
+    def aceita(self, linha):
+        return not self.filtro or self.filtro in normalizar(self.sourceModel().resultados.texto_da_linha(linha))
+
+    def atualizar_posicoes(self):
+        self.posicoes = {linha: posicao for posicao, linha in enumerate(self.linhas)}
+
+    def ordenar_linhas(self):
+        if self.ordenacao:
+            coluna, ordem = self.ordenacao
+            chave = self.sourceModel().resultados.chave_ordenacao(coluna)
+            self.linhas.sort(key=chave, reverse=ordem == Qt.DescendingOrder)
+
+    def reconstruir(self):
+        self.beginResetModel()
+        self.linhas = [linha for linha in range(self.sourceModel().rowCount()) if self.aceita(linha)]
+        self.ordenar_linhas()
+        self.atualizar_posicoes()
+        self.endResetModel()
+
+    def sort(self, coluna, ordem=Qt.AscendingOrder):
+        if coluna < 0 or coluna >= self.columnCount():
+            return
+        self.ordenacao = (coluna, ordem)
+        self.layoutAboutToBeChanged.emit()
+        anteriores = self.persistentIndexList()
+        origens = [self.mapToSource(indice) for indice in anteriores]
+        self.ordenar_linhas()
+        self.atualizar_posicoes()
+        self.changePersistentIndexList(anteriores, [self.mapFromSource(origem) for origem in origens])
+        self.layoutChanged.emit()
+
+    def definir_filtro(self, texto):
+        self.filtro = normalizar(texto)
+        self.reconstruir()
+
+    def inserir_linhas(self, parent, primeira, ultima):
+        novas = [linha for linha in range(primeira, ultima + 1) if self.aceita(linha)]
+        if not novas:
+            return
+        inicio = len(self.linhas)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(novas) - 1)
+        for linha in novas:
+            self.posicoes[linha] = len(self.linhas)
+            self.linhas.append(linha)
+        self.endInsertRows()
+
+    def repassar_mudanca(self, inicio, fim, roles=()):
+        # Uma célula (marcar) é repassada direto; uma faixa (marcar_varios) pode estar espalhada
+        # pela ordem exibida, então a tabela visível inteira é avisada
+        indice = self.mapFromSource(inicio)
+        if indice.isValid() and inicio == fim:
+            self.dataChanged.emit(indice, indice)
+        elif inicio != fim:
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
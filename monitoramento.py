@@ -0,0 +1,93 @@
+import os
+import sys
+
+from busca import PREFIXO_ARQUIVO_TRAVA, percorrer_docx
+
+
+# Função para listar, recursivamente, as subpastas de uma subpasta (caminhos relativos à
+# pasta principal, terminados em "/", como os arquivos de percorrer_docx), sem seguir links
+def listar_subpastas(pasta, relativo=""):
+    try:
+        with os.scandir(os.path.join(pasta, relativo)) as entradas:
+            nomes = sorted(entrada.name for entrada in entradas if entrada.is_dir(follow_symlinks=False))
+    except OSError as e:
+        print(f"Erro ao listar a pasta {os.path.join(pasta, relativo)}: {e}", file=sys.stderr)
+        return
+    for nome in nomes:
+        yield relativo + nome + "/"
+        yield from listar_subpastas(pasta, relativo + nome + "/")
+
+# Função para resumir o que o monitoramento precisa conferir em uma pasta: nome, data e
+# tamanho dos arquivos .docx (sem os de trava do Word) e os nomes das subpastas. Avisos em
+# que a assinatura não muda vêm de outros arquivos, como o índice e o diário do SQLite.
+def assinatura_subpasta(caminho):
+    try:
+        with os.scandir(caminho) as entradas:
+            assinatura = set()
+            for entrada in entradas:
+                if entrada.is_dir(follow_symlinks=False):
+                    assinatura.add((entrada.name, None, None))
+                elif entrada.name.endswith(".docx") and not entrada.name.startswith(PREFIXO_ARQUIVO_TRAVA):
+                    estado = entrada.stat()
+                    assinatura.add((entrada.name, estado.st_mtime_ns, estado.st_size))
+    except OSError:
+        return None  # Pasta apagada: o aviso é conferido
+    return frozenset(assinatura)
+
+# Função para descobrir o que mudou nas subpastas avisadas pelo monitoramento da pasta,
+# comparando os arquivos de cada uma (sem descer às subpastas já monitoradas, que têm os
+# próprios avisos) com a data e o tamanho guardados: {arquivo: (mtime, tamanho)}, como em
+# IndicePalavras.estado_arquivos. Subpastas que ainda não eram monitoradas entram inteiras.
+# Retorna (arquivos novos ou alterados, arquivos guardados que sumiram, subpastas novas).
+def comparar_subpastas(pasta, subpastas, monitoradas, guardados):
+    alterados, removidos, novas = [], set(), []
+    for relativo in sorted(subpastas):
+        existentes = set()
+        lidas = []
+        try:
+            with os.scandir(os.path.join(pasta, relativo)) as entradas:
+                filhas = sorted(relativo + entrada.name + "/" for entrada in entradas
+                                if entrada.is_dir(follow_symlinks=False))
+            lidas.append(relativo)
+            for filha in filhas:
+                if filha not in monitoradas:
+                    novas_da_filha = [filha] + list(listar_subpastas(pasta, filha))
+                    novas.extend(novas_da_filha)
+                    lidas.extend(novas_da_filha)
+            for lida in lidas:
+                existentes.update(lida + arquivo for arquivo in percorrer_docx(os.path.join(pasta, lida), recursivo=False))
+        except OSError:
+            pass  # Subpasta apagada depois do aviso: os arquivos guardados dela saem abaixo
+        else:
+            for arquivo in sorted(existentes):
+                try:
+                    estado = os.stat(os.path.join(pasta, arquivo))
+                except OSError:
+                    continue
+                if guardados.get(arquivo) != (estado.st_mtime, estado.st_size):
+                    alterados.append(arquivo)
+
+        # Arquivos guardados que sumiram das subpastas lidas ou de subpastas apagadas (ou
+        # renomeadas); as demais subpastas monitoradas são conferidas pelos próprios avisos
+        for arquivo in guardados:
+            if not arquivo.startswith(relativo) or arquivo in existentes:
+                continue
+            subpasta = arquivo[:arquivo.rfind("/") + 1]
+            if ((subpasta in lidas or not os.path.isdir(os.path.join(pasta, subpasta)))
+                    and not os.path.exists(os.path.join(pasta, arquivo))):
+                removidos.add(arquivo)
+    return alterados, sorted(removidos), novas
+
+# Função para juntar ao resultado de comparar_subpastas os arquivos de uma atualização
+# cancelada. O índice já pode ter guardado a data e o tamanho novos deles, e a comparação não
+# os veria mais como alterados, embora a tabela ainda não tenha sido atualizada. Cada pendente
+# entra como alterado se ainda existe, ou como removido se sumiu.
+def juntar_pendentes(pasta, alterados, removidos, pendentes):
+    alterados, removidos = set(alterados), set(removidos)
+    for arquivo in pendentes:
+        if os.path.exists(os.path.join(pasta, arquivo)):
+            alterados.add(arquivo)
+            removidos.discard(arquivo)
+        elif arquivo not in alterados:
+            removidos.add(arquivo)
+    return sorted(alterados), sorted(removidos)
@@ -0,0 +1,105 @@
+import perfil
+from cache_texto import cache_textos, ler_documento, varrer_com_cache
+from normalizacao import normalizar
+
+
+# Classe que procura vários termos de uma vez no texto (autômato de Aho–Corasick):
+# cada caractere do texto é lido uma única vez, qualquer que seja a quantidade de termos
+class AutomatoTermos:
+    def __init__(self, termos):
+        self.termos = [normalizar(termo) for termo in termos]
+        self.todos = (1 << len(self.termos)) - 1
+        self.transicoes = [{}]
+        self.falhas = [0]
+        self.saidas = [0]  # Máscara de bits com os termos que terminam em cada estado
+
+        for indice_termo, termo in enumerate(self.termos):
+            estado = 0
+            for caractere in termo:
+                proximo = self.transicoes[estado].get(caractere)
+                if proximo is None:
+                    proximo = len(self.transicoes)
+                    self.transicoes.append({})
+                    self.falhas.append(0)
+                    self.saidas.append(0)
+                    self.transicoes[estado][caractere] = proximo
+                estado = proximo
+            self.saidas[estado] |= 1 << indice_termo
+
+        # Liga cada estado ao maior sufixo que também é prefixo de algum termo (em largura)
+        fila = list(self.transicoes[0].values())
+        for estado in fila:
+            for caractere, proximo in self.transicoes[estado].items():
+                falha = self.falhas[estado]
+                while falha and caractere not in self.transicoes[falha]:
+                    falha = self.falhas[falha]
+                destino = self.transicoes[falha].get(caractere, 0)
+                self.falhas[proximo] = destino if destino != proximo else 0
+                self.saidas[proximo] |= self.saidas[self.falhas[proximo]]
+                fila.append(proximo)
+
+    # Retorna a máscara de bits dos termos presentes nos parágrafos (já normalizados).
+    # A leitura para assim que todos os termos foram encontrados.
+    def procurar(self, paragrafos):
+        if len(self.termos) == 1:
+            # Com um único termo, a comparação nativa de strings é mais rápida que o autômato
+            return int(any(self.termos[0] in texto for texto in paragrafos))
+
+        transicoes, falhas, saidas = self.transicoes, self.falhas, self.saidas
+        encontrados = 0
+        for texto in paragrafos:
+            # Cada parágrafo é procurado separadamente, como na busca original
+            estado = 0
+            for caractere in texto:
+                while estado and caractere not in transicoes[estado]:
+                    estado = falhas[estado]
+                estado = transicoes[estado].get(caractere, 0)
+                if saidas[estado]:
+                    encontrados |= saidas[estado]
+                    if encontrados == self.todos:
+                        return encontrados
+        return encontrados
+
+    def presenca(self, paragrafos):
+        mascara = self.procurar(paragrafos)
+        return [bool(mascara >> indice & 1) for indice in range(len(self.termos))]
+
+
+# Autômatos já montados em cada processo, para não remontá-los a cada arquivo
+automatos = {}
+
+def obter_automato(termos):
+    termos = tuple(termos)
+    if termos not in automatos:
+        automatos.clear()
+        automatos[termos] = AutomatoTermos(termos)
+    return automatos[termos]
+
+# Função executada nos processos da varredura: extrai o texto normalizado de um arquivo
+# .docx e marca os termos presentes. O texto e o mapa de trigramas voltam junto para o cache.
+def extrair_e_marcar_termos(arquivo, termos):
+    paragrafos, mapa = ler_documento(arquivo)
+    with perfil.medir_etapa("comparacao"):
+        return paragrafos, mapa, obter_automato(termos).presenca(paragrafos)
+
+# Função para procurar vários termos nos arquivos com uma única leitura de cada documento.
+# Os arquivos com texto em cache são respondidos na hora; os demais são extraídos em
+# paralelo. Devolve (arquivo, [encontrado por termo]) à medida que cada arquivo termina.
+def varrer_termos_nos_arquivos(pasta, arquivos, termos, cache=cache_textos, progress_callback=None,
+                               cancelamento=None, **opcoes_varredura):
+    termos = tuple(normalizar(termo) for termo in termos)
+    automato = obter_automato(termos)
+
+    def avaliar(paragrafos):
+        with perfil.medir_etapa("comparacao"):
+            return automato.presenca(paragrafos)
+
+    return varrer_com_cache(
+        pasta, arquivos, avaliar, extrair_e_marcar_termos, (termos,), cache=cache,
+        progress_callback=progress_callback, cancelamento=cancelamento, **opcoes_varredura
+    )
+
+# Função para montar a matriz arquivo x termo (True quando o termo aparece no arquivo)
+def buscar_termos_nos_arquivos(pasta, arquivos, termos, progress_callback=None, **opcoes_varredura):
+    return dict(varrer_termos_nos_arquivos(pasta, arquivos, termos, progress_callback=progress_callback,
+                                           **opcoes_varredura))
@@ -0,0 +1,45 @@
+import re
+import unicodedata
+
+# Normalização usada em toda comparação de texto: decomposição Unicode (NFKD), remoção dos
+# acentos, casefold e espaços em sequência reduzidos a um só (sem espaços nas pontas).
+# Assim "Não", "nao" e "NÃO" ficam iguais. O texto é normalizado uma única vez, na
+# extração, e as buscas comparam direto o texto normalizado.
+MARCAS_COMBINANTES = re.compile("[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]+")
+
+
+# Função para normalizar um texto (parágrafo do documento ou termo da busca)
+def normalizar(texto):
+    if texto.isascii():
+        # Sem acentos nem caracteres especiais basta trocar as maiúsculas
+        return " ".join(texto.lower().split())
+    texto = MARCAS_COMBINANTES.sub("", unicodedata.normalize("NFKD", texto))
+    return " ".join(texto.casefold().split())
+
+# Função para normalizar um texto guardando, para cada caractere do resultado, a posição do
+# caractere de origem no texto original. Devolve (texto normalizado, mapa de posições),
+# usado para destacar no texto original um trecho encontrado no texto normalizado.
+def normalizar_com_mapa(texto):
+    caracteres = []
+    mapa = []
+    for posicao, caractere in enumerate(texto):
+        decomposto = MARCAS_COMBINANTES.sub("", unicodedata.normalize("NFKD", caractere)).casefold()
+        for parte in decomposto:
+            if parte.isspace():
+                if not caracteres or caracteres[-1] == " ":
+                    continue
+                parte = " "
+            caracteres.append(parte)
+            mapa.append(posicao)
+    if caracteres and caracteres[-1] == " ":
+        caracteres.pop()
+        mapa.pop()
+    return "".join(caracteres), mapa
+
+# Função para localizar no texto original as ocorrências de uma expressão regular (compilada,
+# sobre o texto normalizado), devolvendo os intervalos (início, fim) de cada ocorrência em
+# posições do texto original. Ocorrências vazias são ignoradas.
+def localizar_no_original(texto, expressao):
+    normalizado, mapa = normalizar_com_mapa(texto)
+    return [(mapa[encontrado.start()], mapa[encontrado.end() - 1] + 1)
+            for encontrado in expressao.finditer(normalizado) if encontrado.end() > encontrado.start()]
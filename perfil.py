@@ -0,0 +1,135 @@
+import heapq
+import json
+import threading
+import time
+from contextlib import nullcontext
+
+# Quantidade de arquivos mais lentos guardados no relatório
+MAX_ARQUIVOS_LENTOS = 20
+
+
+# Classe que acumula o tempo gasto em cada etapa da busca (listagem, abertura do zip,
+# descompactação, extração, comparação, tabela...), os arquivos mais lentos e as falhas
+# de abertura. Só existe enquanto a medição está ativada, para não pesar na busca normal.
+class Perfil:
+    def __init__(self, max_arquivos_lentos=MAX_ARQUIVOS_LENTOS):
+        self.max_arquivos_lentos = max_arquivos_lentos
+        self.etapas = {}  # Etapa -> [segundos, chamadas]
+        self.arquivos_lentos = []  # Heap com (segundos, arquivo) dos arquivos mais lentos
+        self.falhas = []  # (arquivo, erro)
+        self.trava = threading.Lock()
+
+    def registrar(self, etapa, segundos, chamadas=1):
+        with self.trava:
+            acumulado = self.etapas.setdefault(etapa, [0.0, 0])
+            acumulado[0] += segundos
+            acumulado[1] += chamadas
+
+    def medir(self, etapa):
+        return Medicao(self, etapa)
+
+    def registrar_arquivo(self, arquivo, segundos):
+        with self.trava:
+            if len(self.arquivos_lentos) < self.max_arquivos_lentos:
+                heapq.heappush(self.arquivos_lentos, (segundos, arquivo))
+            else:
+                heapq.heappushpop(self.arquivos_lentos, (segundos, arquivo))
+
+    def registrar_falha(self, arquivo, erro):
+        with self.trava:
+            self.falhas.append((arquivo, f"{type(erro).__name__}: {erro}"))
+
+    # Dados brutos, para serem enviados de um processo da varredura para o processo principal
+    def dados(self):
+        with self.trava:
+            return {"etapas": dict(self.etapas), "arquivos_lentos": list(self.arquivos_lentos),
+                    "falhas": list(self.falhas)}
+
+    def mesclar(self, dados):
+        for etapa, (segundos, chamadas) in dados["etapas"].items():
+            self.registrar(etapa, segundos, chamadas)
+        for segundos, arquivo in dados["arquivos_lentos"]:
+            self.registrar_arquivo(arquivo, segundos)
+        with self.trava:
+            self.falhas.extend(dados["falhas"])
+
+    def relatorio(self):
+        with self.trava:
+            return {
+                "etapas": {
+                    etapa: {"segundos": round(segundos, 4), "chamadas": chamadas,
+                            "media_ms": round(segundos / chamadas * 1000, 3) if chamadas else None}
+                    for etapa, (segundos, chamadas) in sorted(self.etapas.items(), key=lambda item: -item[1][0])
+                },
+                "arquivos_mais_lentos": [
+                    {"arquivo": arquivo, "ms": round(segundos * 1000, 3)}
+                    for segundos, arquivo in sorted(self.arquivos_lentos, reverse=True)
+                ],
+                "falhas_de_abertura": {
+                    "quantidade": len(self.falhas),
+                    "arquivos": [{"arquivo": arquivo, "erro": erro} for arquivo, erro in self.falhas],
+                },
+            }
+
+    def exportar_json(self, caminho):
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.relatorio(), f, ensure_ascii=False, indent=2)
+
+    # Relatório em texto, para o painel de diagnóstico
+    def texto(self):
+        relatorio = self.relatorio()
+        linhas = ["Tempo por etapa:"]
+        for etapa, dados in relatorio["etapas"].items():
+            linhas.append(f"  {etapa}: {dados['segundos']:.3f} s em {dados['chamadas']} chamada(s), "
+                          f"média de {dados['media_ms']} ms")
+        linhas.append("\nArquivos mais lentos:")
+        for dados in relatorio["arquivos_mais_lentos"]:
+            linhas.append(f"  {dados['ms']:.1f} ms  {dados['arquivo']}")
+        falhas = relatorio["falhas_de_abertura"]
+        linhas.append(f"\nFalhas de abertura: {falhas['quantidade']}")
+        for dados in falhas["arquivos"]:
+            linhas.append(f"  {dados['arquivo']}: {dados['erro']}")
+        return "\n".join(linhas)
+
+
+# Classe usada em "with perfil.medir_etapa(...)", somando o tempo do bloco à etapa
+class Medicao:
+    def __init__(self, perfil, etapa):
+        self.perfil = perfil
+        self.etapa = etapa
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *erro):
+        self.perfil.registrar(self.etapa, time.perf_counter() - self.inicio)
+        return False
+
+
+# Perfil ativo neste processo (None quando a medição está desativada)
+perfil_atual = None
+
+def ativar():
+    global perfil_atual
+    perfil_atual = Perfil()
+    return perfil_atual
+
+def desativar():
+    global perfil_atual
+    perfil_atual = None
+
+def esta_ativo():
+    return perfil_atual is not None
+
+# Funções usadas nos pontos medidos do código; sem perfil ativo não fazem nada
+def medir_etapa(etapa):
+    return perfil_atual.medir(etapa) if perfil_atual else nullcontext()
+
+def registrar_arquivo(arquivo, segundos):
+    if perfil_atual:
+        perfil_atual.registrar_arquivo(arquivo, segundos)
+
+def registrar_falha(arquivo, erro):
+    if perfil_atual:
+        perfil_atual.registrar_falha(arquivo, erro)
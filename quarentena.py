@@ -0,0 +1,72 @@
+import json
+import os
+import sys
+
+# Arquivo padrão da quarentena, na pasta do usuário: vale para qualquer pasta pesquisada,
+# inclusive compartilhamentos de rede sem permissão de escrita
+CAMINHO_QUARENTENA_PADRAO = os.path.join(os.path.expanduser("~"), ".busca_docx_quarentena.json")
+
+
+# Classe com os arquivos que falharam na leitura (corrompidos, grandes demais, que passaram do
+# tempo limite ou derrubaram o processo da varredura), gravada em disco entre as buscas.
+# Enquanto um arquivo não muda (mesma data de modificação e tamanho), as buscas seguintes o
+# pulam sem abrir; modificado, ele sai da quarentena e é lido de novo.
+class Quarentena:
+    def __init__(self, caminho=CAMINHO_QUARENTENA_PADRAO):
+        self.caminho = caminho
+        self.arquivos = {}  # Caminho absoluto -> [mtime_ns, tamanho, tipo do erro, motivo]
+        self.alterada = False
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                self.arquivos = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Erro ao ler a quarentena {caminho}: {e}", file=sys.stderr)
+
+    def __len__(self):
+        return len(self.arquivos)
+
+    # Retorna (tipo do erro, motivo) se o arquivo está em quarentena e não mudou desde então
+    def consultar(self, arquivo):
+        chave = os.path.abspath(arquivo)
+        registro = self.arquivos.get(chave)
+        if registro is None:
+            return None
+        try:
+            estado = os.stat(arquivo)
+        except OSError:
+            return None
+        if registro[:2] != [estado.st_mtime_ns, estado.st_size]:
+            del self.arquivos[chave]
+            self.alterada = True
+            return None
+        return registro[2], registro[3]
+
+    def adicionar(self, arquivo, erro):
+        try:
+            estado = os.stat(arquivo)
+        except OSError:
+            return
+        self.arquivos[os.path.abspath(arquivo)] = [estado.st_mtime_ns, estado.st_size, erro.tipo, str(erro)]
+        self.alterada = True
+
+    def limpar(self):
+        if self.arquivos:
+            self.arquivos.clear()
+            self.alterada = True
+
+    # Grava a quarentena, se mudou; grava em um arquivo temporário e troca, para não deixar
+    # um arquivo pela metade se a busca for interrompida
+    def salvar(self):
+        if not self.alterada:
+            return
+        temporario = self.caminho + ".tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(self.arquivos, f, ensure_ascii=False)
+            os.replace(temporario, self.caminho)
+        except OSError as e:
+            print(f"Erro ao gravar a quarentena {self.caminho}: {e}", file=sys.stderr)
+            return
+        self.alterada = False
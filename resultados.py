@@ -0,0 +1,85 @@
+import sys
+
+# Colunas fixas da tabela de resultados; cada termo da segunda busca acrescenta uma coluna Sim/Não
+COLUNAS_FIXAS = ["Código", "Empresa", "Status"]
+
+
+# Classe que guarda os resultados da busca em colunas (uma lista por campo e um bytearray
+# por termo buscado), em vez de um objeto por célula. Uma coluna de termo nova não mexe
+# nas linhas já guardadas: ela nasce com "Não" (zero) em todas.
+class ResultadosBusca:
+    def __init__(self):
+        self.limpar()
+
+    def limpar(self):
+        self.arquivos = []
+        self.codigos = []
+        self.empresas = []
+        self.status = []
+        self.termos = []
+        self.acertos = []  # Um bytearray por termo: 1 na linha do arquivo que contém o termo
+        self.linhas = {}  # Arquivo -> linha
+
+    def __len__(self):
+        return len(self.arquivos)
+
+    def cabecalhos(self):
+        return COLUNAS_FIXAS + self.termos
+
+    # Acrescenta um arquivo e retorna a linha dele
+    def adicionar(self, arquivo, codigo, empresa, status):
+        linha = len(self.arquivos)
+        self.linhas[arquivo] = linha
+        self.arquivos.append(arquivo)
+        self.codigos.append(codigo)
+        # Empresas e status se repetem muito; sys.intern guarda uma única cópia de cada texto
+        self.empresas.append(sys.intern(empresa))
+        self.status.append(sys.intern(status))
+        for acertos in self.acertos:
+            acertos.append(0)
+        return linha
+
+    # Acrescenta colunas de termos e retorna a coluna da primeira
+    def adicionar_termos(self, termos):
+        primeira_coluna = len(COLUNAS_FIXAS) + len(self.termos)
+        for termo in termos:
+            self.termos.append(termo)
+            self.acertos.append(bytearray(len(self.arquivos)))
+        return primeira_coluna
+
+    # Marca se o arquivo contém o termo da coluna; retorna a linha do arquivo (None se não está na tabela)
+    def marcar(self, arquivo, coluna, encontrado=True):
+        linha = self.linhas.get(arquivo)
+        if linha is not None:
+            self.acertos[coluna - len(COLUNAS_FIXAS)][linha] = 1 if encontrado else 0
+        return linha
+
+    # Retira arquivos (um conjunto) da tabela; as linhas seguintes sobem
+    def remover(self, arquivos):
+        manter = [linha for linha, arquivo in enumerate(self.arquivos) if arquivo not in arquivos]
+        self.arquivos = [self.arquivos[linha] for linha in manter]
+        self.codigos = [self.codigos[linha] for linha in manter]
+        self.empresas = [self.empresas[linha] for linha in manter]
+        self.status = [self.status[linha] for linha in manter]
+        self.acertos = [bytearray(acertos[linha] for linha in manter) for acertos in self.acertos]
+        self.linhas = {arquivo: linha for linha, arquivo in enumerate(self.arquivos)}
+
+    def valor(self, linha, coluna):
+        if coluna == 0:
+            return self.codigos[linha]
+        if coluna == 1:
+            return self.empresas[linha]
+        if coluna == 2:
+            return self.status[linha]
+        return "Sim" if self.acertos[coluna - len(COLUNAS_FIXAS)][linha] else "Não"
+
+    # Função usada como chave para ordenar as linhas por uma coluna
+    def chave_ordenacao(self, coluna):
+        if coluna < len(COLUNAS_FIXAS):
+            valores = (self.codigos, self.empresas, self.status)[coluna]
+            return valores.__getitem__
+        return self.acertos[coluna - len(COLUNAS_FIXAS)].__getitem__
+
+    # Texto das colunas fixas de uma linha, usado pelo filtro da tabela
+    def texto_da_linha(self, linha):
+        return f"{self.codigos[linha]} {self.empresas[linha]} {self.status[linha]}"
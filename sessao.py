@@ -0,0 +1,81 @@
+import json
+import os
+import sqlite3
+from collections import namedtuple
+
+from resultados import ResultadosBusca
+
+# Extensão sugerida para os arquivos de sessão
+EXTENSAO_SESSAO = ".buscasessao"
+# Versão do formato da sessão; muda quando as tabelas gravadas mudam
+VERSAO_SESSAO = 1
+
+# Conteúdo de uma sessão: a pasta, os termos buscados (o da primeira busca e os das colunas),
+# os arquivos encontrados na primeira busca e a tabela de resultados
+Sessao = namedtuple("Sessao", ["pasta", "termos_buscados", "arquivos_primeira_busca", "resultados"])
+
+
+class ErroSessao(ValueError):
+    pass
+
+
+# Função para gravar a sessão em um arquivo SQLite. As colunas de termos são gravadas como
+# estão em ResultadosBusca (um bytearray por termo), o que deixa o arquivo pequeno e a
+# leitura rápida mesmo com dezenas de milhares de linhas. Grava em um arquivo temporário e
+# troca, para não estragar uma sessão anterior com o mesmo nome se a gravação falhar.
+def salvar_sessao(caminho, pasta, termos_buscados, arquivos_primeira_busca, resultados):
+    temporario = caminho + ".tmp"
+    if os.path.exists(temporario):
+        os.remove(temporario)
+    conexao = sqlite3.connect(temporario)
+    try:
+        with conexao:
+            conexao.executescript("""
+                CREATE TABLE sessao (chave TEXT PRIMARY KEY, valor TEXT);
+                CREATE TABLE linhas (linha INTEGER PRIMARY KEY, arquivo TEXT, codigo TEXT, empresa TEXT, status TEXT);
+                CREATE TABLE colunas (coluna INTEGER PRIMARY KEY, termo TEXT, acertos BLOB);
+                CREATE TABLE primeira_busca (arquivo TEXT);
+            """)
+            conexao.executemany("INSERT INTO sessao VALUES (?, ?)", [
+                ("versao", str(VERSAO_SESSAO)),
+                ("pasta", pasta),
+                ("termos_buscados", json.dumps(termos_buscados, ensure_ascii=False)),
+            ])
+            conexao.executemany("INSERT INTO linhas VALUES (?, ?, ?, ?, ?)", zip(
+                range(len(resultados)), resultados.arquivos, resultados.codigos, resultados.empresas, resultados.status
+            ))
+            conexao.executemany("INSERT INTO colunas VALUES (?, ?, ?)", [
+                (coluna, termo, bytes(acertos))
+                for coluna, (termo, acertos) in enumerate(zip(resultados.termos, resultados.acertos))
+            ])
+            conexao.executemany("INSERT INTO primeira_busca VALUES (?)", ((arquivo,) for arquivo in arquivos_primeira_busca))
+    finally:
+        conexao.close()
+    os.replace(temporario, caminho)
+
+# Função para ler uma sessão gravada por salvar_sessao; levanta ErroSessao se o arquivo
+# não é uma sessão ou é de uma versão que este programa não lê
+def carregar_sessao(caminho):
+    if not os.path.isfile(caminho):
+        raise ErroSessao(f"O arquivo {caminho} não existe.")
+    conexao = sqlite3.connect(caminho)
+    try:
+        try:
+            valores = dict(conexao.execute("SELECT chave, valor FROM sessao"))
+        except sqlite3.DatabaseError:
+            raise ErroSessao(f"{caminho} não é um arquivo de sessão.")
+        if valores.get("versao") != str(VERSAO_SESSAO):
+            raise ErroSessao(f"A sessão {caminho} foi gravada em um formato que esta versão não lê.")
+
+        resultados = ResultadosBusca()
+        for _, arquivo, codigo, empresa, status in conexao.execute("SELECT * FROM linhas ORDER BY linha"):
+            resultados.adicionar(arquivo, codigo, empresa, status)
+        for _, termo, acertos in conexao.execute("SELECT * FROM colunas ORDER BY coluna"):
+            if len(acertos) != len(resultados):
+                raise ErroSessao(f"A coluna '{termo}' da sessão {caminho} está incompleta.")
+            resultados.adicionar_termos([termo])
+            resultados.acertos[-1] = bytearray(acertos)
+        arquivos_primeira_busca = [arquivo for (arquivo,) in conexao.execute("SELECT arquivo FROM primeira_busca")]
+    finally:
+        conexao.close()
+    return Sessao(valores["pasta"], json.loads(valores["termos_buscados"]), arquivos_primeira_busca, resultados)
@@ -0,0 +1,89 @@
+import html
+import os
+import re
+
+from cache_texto import cache_textos
+from consulta import analisar_consulta, eh_consulta_avancada
+from extrator import extrair_paragrafos_docx
+from normalizacao import localizar_no_original, normalizar
+
+# Caracteres mostrados antes e depois de cada ocorrência, e quantidade máxima de trechos por arquivo
+CONTEXTO_PADRAO = 80
+MAX_TRECHOS_PADRAO = 20
+
+
+# Função para montar a expressão que localiza os termos da busca no texto normalizado.
+# Termos simples são procurados como trecho de texto; nas consultas avançadas são destacadas
+# as palavras inteiras (ou começadas pelo prefixo) que não estão negadas.
+def expressao_dos_termos(termos):
+    partes = []
+    for termo in termos:
+        if eh_consulta_avancada(termo):
+            for palavra, prefixo in analisar_consulta(termo).palavras_destacadas():
+                partes.append(r"(?<!\w)" + re.escape(palavra) + (r"\w*" if prefixo else r"(?!\w)"))
+        elif normalizar(termo):
+            partes.append(re.escape(normalizar(termo)))
+    if not partes:
+        return None
+    # As partes mais longas primeiro, para que um termo não corte outro que o contém
+    return re.compile("|".join(sorted(set(partes), key=len, reverse=True)))
+
+# Função para localizar as ocorrências nos parágrafos originais, devolvendo
+# (índice do parágrafo, início, fim) em posições do texto original. Com os parágrafos
+# já normalizados (do cache), só os parágrafos com alguma ocorrência são mapeados.
+def localizar_ocorrencias(paragrafos, expressao, normalizados=None):
+    if normalizados is not None and len(normalizados) != len(paragrafos):
+        normalizados = None
+    ocorrencias = []
+    for indice, texto in enumerate(paragrafos):
+        if normalizados is not None and not expressao.search(normalizados[indice]):
+            continue
+        ocorrencias.extend((indice, inicio, fim) for inicio, fim in localizar_no_original(texto, expressao))
+    return ocorrencias
+
+# Função para juntar as ocorrências de cada parágrafo em trechos com contexto. Devolve
+# (índice do parágrafo, início do trecho, fim do trecho, [(início, fim) de cada destaque]).
+def agrupar_em_trechos(paragrafos, ocorrencias, contexto=CONTEXTO_PADRAO, max_trechos=MAX_TRECHOS_PADRAO):
+    trechos = []
+    for indice, inicio, fim in ocorrencias:
+        inicio_trecho = max(0, inicio - contexto)
+        fim_trecho = min(len(paragrafos[indice]), fim + contexto)
+        anterior = trechos[-1] if trechos else None
+        if anterior and anterior[0] == indice and inicio_trecho <= anterior[2]:
+            # Ocorrência próxima da anterior no mesmo parágrafo: mesmo trecho
+            anterior[2] = max(anterior[2], fim_trecho)
+            anterior[3].append((inicio, fim))
+            continue
+        if len(trechos) == max_trechos:
+            break
+        trechos.append([indice, inicio_trecho, fim_trecho, [(inicio, fim)]])
+    return [tuple(trecho) for trecho in trechos]
+
+# Função para montar os trechos de um arquivo onde os termos aparecem. É chamada só para o
+# arquivo selecionado: o texto original é extraído de novo (um único arquivo) e o texto
+# normalizado do cache, quando existe, indica direto quais parágrafos têm ocorrências.
+def montar_trechos(pasta, arquivo, termos, cache=cache_textos, contexto=CONTEXTO_PADRAO,
+                   max_trechos=MAX_TRECHOS_PADRAO):
+    expressao = expressao_dos_termos(termos)
+    if expressao is None:
+        return [], []
+    caminho = os.path.join(pasta, arquivo)
+    paragrafos = list(extrair_paragrafos_docx(caminho))
+    ocorrencias = localizar_ocorrencias(paragrafos, expressao, cache.obter(caminho))
+    return paragrafos, agrupar_em_trechos(paragrafos, ocorrencias, contexto, max_trechos)
+
+# Função para formatar os trechos em HTML, com as ocorrências destacadas
+def trechos_em_html(paragrafos, trechos):
+    blocos = []
+    for indice, inicio_trecho, fim_trecho, destaques in trechos:
+        texto = paragrafos[indice]
+        partes = ["…" if inicio_trecho > 0 else ""]
+        posicao = inicio_trecho
+        for inicio, fim in destaques:
+            partes.append(html.escape(texto[posicao:inicio]))
+            partes.append(f'<span style="background-color: #ffeb3b"><b>{html.escape(texto[inicio:fim])}</b></span>')
+            posicao = fim
+        partes.append(html.escape(texto[posicao:fim_trecho]))
+        partes.append("…" if fim_trecho < len(texto) else "")
+        blocos.append(f"<p><i>Parágrafo {indice + 1}:</i> {''.join(partes)}</p>")
+    return "".join(blocos)
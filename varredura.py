@@ -0,0 +1,435 @@
+import os
+import sys
+import threading
+import time
+from collections import deque
+from itertools import chain, count, islice
+
+import perfil
+
+# Configuração padrão da varredura paralela: número de processos (None usa todos os
+# núcleos da máquina) e quantidade de arquivos enviada a cada processo por vez
+NUM_PROCESSOS_PADRAO = None
+TAMANHO_LOTE_PADRAO = 16
+# Lotes enviados a cada processo antes de esperar algum terminar
+LOTES_POR_PROCESSO = 2
+# Tempo máximo (segundos) de leitura de um arquivo nos processos da varredura; None desativa
+# (e, sem ele, as varreduras pequenas são lidas no próprio processo)
+TEMPO_LIMITE_PADRAO = 60
+# Intervalo (segundos) entre as conferências do cancelamento enquanto um arquivo é lido
+INTERVALO_CANCELAMENTO = 0.1
+
+
+# Exceção que a função aplicada a um arquivo levanta para que ele seja ignorado na
+# varredura (um documento grande demais, por exemplo), sem interromper os demais arquivos.
+# O tipo aparece na lista de erros; os arquivos com erro permanente vão para a quarentena.
+class ArquivoIgnorado(Exception):
+    tipo = "ignorado"
+    permanente = True
+
+
+# Arquivo que não pôde ser lido (zip ou XML corrompido, por exemplo)
+class ErroLeitura(ArquivoIgnorado):
+    tipo = "erro de leitura"
+
+
+# Arquivo inacessível no momento (sem permissão, aberto no Word, apagado durante a busca);
+# não vai para a quarentena, pois pode ser lido na próxima busca
+class ErroAcesso(ArquivoIgnorado):
+    tipo = "erro de acesso"
+    permanente = False
+
+
+# Arquivo cuja leitura passou do tempo limite; o processo que o lia foi encerrado
+class TempoEsgotado(ArquivoIgnorado):
+    tipo = "tempo esgotado"
+
+
+# Arquivo cuja leitura derrubou o processo da varredura
+class FalhaProcesso(ArquivoIgnorado):
+    tipo = "falha do processo"
+
+
+# Arquivo pulado por estar na quarentena de uma busca anterior
+class EmQuarentena(ArquivoIgnorado):
+    tipo = "quarentena"
+    permanente = False
+
+
+# Início da leitura do arquivo atual no processo (usado pela vigia do tempo limite)
+inicio_arquivo_atual = None
+# Vaga do processo na memória compartilhada em que cada processo do pool informa o arquivo
+# que está lendo: (leituras, primeira posição da vaga), ou None fora do pool
+vaga_leitura = None
+# Situação de uma leitura informada na vaga: em andamento, ou encerrada pela vigia
+LENDO, LEITURA_ESGOTADA = 0, 1
+
+# Processo reserva das varreduras pequenas, com o tempo limite dele: (pool, tempo_limite)
+reserva = None
+trava_reserva = threading.Lock()
+
+
+# Função para aplicar a função a um arquivo, registrando o tempo gasto quando a medição está ativa.
+# Um arquivo ignorado, ou que deu erro, devolve a exceção (ArquivoIgnorado) no lugar do resultado.
+def processar_arquivo(funcao, pasta, arquivo, argumentos):
+    global inicio_arquivo_atual
+    inicio_arquivo_atual = inicio = time.monotonic()
+    try:
+        resultado = funcao(os.path.join(pasta, arquivo), *argumentos)
+    except ArquivoIgnorado as e:
+        resultado = e
+    except OSError as e:
+        perfil.registrar_falha(arquivo, e)
+        resultado = ErroAcesso(f"{type(e).__name__}: {e}")
+    except Exception as e:
+        perfil.registrar_falha(arquivo, e)
+        resultado = ErroLeitura(f"{type(e).__name__}: {e}")
+    finally:
+        inicio_arquivo_atual = None
+    if perfil.esta_ativo():
+        perfil.registrar_arquivo(arquivo, time.monotonic() - inicio)
+    return resultado
+
+# Função executada dentro de cada processo: aplica a função a um lote de arquivos. Com a
+# medição ativa, o lote é medido em um perfil próprio, devolvido junto com os resultados.
+# O número do lote e a posição de cada arquivo nele ficam na vaga do processo enquanto o
+# arquivo é lido, para que um processo morto aponte o arquivo responsável.
+def processar_lote(funcao, pasta, lote, argumentos, com_perfil=False, numero_lote=-1):
+    perfil_lote = perfil.ativar() if com_perfil else None
+    try:
+        resultados = []
+        for posicao, arquivo in enumerate(lote):
+            informar_leitura(numero_lote, posicao)
+            resultados.append((arquivo, processar_arquivo(funcao, pasta, arquivo, argumentos)))
+        informar_leitura(-1, -1)
+    finally:
+        if com_perfil:
+            perfil.desativar()
+    return resultados, perfil_lote.dados() if perfil_lote else None
+
+# Função para informar, na vaga do processo, o arquivo que ele está lendo (lote, posição)
+def informar_leitura(numero_lote, posicao, situacao=LENDO):
+    if vaga_leitura is not None:
+        leituras, inicio = vaga_leitura
+        leituras[inicio:inicio + 3] = [numero_lote, posicao, situacao]
+
+# Função executada por uma thread em cada processo da varredura: encerra o processo se um
+# arquivo passar do tempo limite. Um zip patológico pode travar a leitura dentro do
+# descompactador, onde não há como interrompê-la; encerrar o processo é o único jeito seguro.
+def vigiar_tempo_limite(tempo_limite):
+    while True:
+        time.sleep(min(1.0, tempo_limite / 4))
+        inicio = inicio_arquivo_atual
+        if inicio is not None and time.monotonic() - inicio > tempo_limite:
+            if vaga_leitura is not None:
+                leituras, inicio_vaga = vaga_leitura
+                leituras[inicio_vaga + 2] = LEITURA_ESGOTADA
+            os._exit(1)
+
+# Função executada ao iniciar cada processo da varredura; com as leituras (criar_leituras),
+# o processo ocupa a próxima vaga livre
+def iniciar_processo(tempo_limite, leituras=None, vagas=None):
+    global vaga_leitura
+    if leituras is not None:
+        with vagas.get_lock():
+            vaga = vagas.value
+            vagas.value += 1
+        vaga_leitura = (leituras, 3 * vaga)
+    if tempo_limite:
+        threading.Thread(target=vigiar_tempo_limite, args=(tempo_limite,), daemon=True).start()
+
+# Função para dividir os arquivos (lista ou gerador) em lotes, à medida que eles chegam
+def dividir_em_lotes(arquivos, tamanho_lote):
+    iterador = iter(arquivos)
+    return iter(lambda: list(islice(iterador, tamanho_lote)), [])
+
+# Função para avisar um arquivo ignorado; sem callback, o aviso vai para a saída de erro
+def avisar_ignorado(pasta, arquivo, erro, ignorado_callback=None, quarentena=None):
+    if quarentena is not None and erro.permanente:
+        quarentena.adicionar(os.path.join(pasta, arquivo), erro)
+    if ignorado_callback:
+        ignorado_callback(arquivo, erro)
+    else:
+        print(f"Arquivo ignorado ({erro.tipo}): {arquivo}: {erro}", file=sys.stderr)
+
+# Função para aplicar uma função a cada arquivo usando vários processos. Os arquivos podem vir
+# de uma lista ou de um gerador (como percorrer_docx): os lotes são enviados aos processos à
+# medida que os arquivos chegam, sem esperar a listagem inteira. Os resultados (arquivo,
+# resultado) são devolvidos à medida que os lotes terminam, fora da ordem original. A função
+# precisa estar definida no nível de um módulo para poder ser enviada aos processos. Se o
+# evento de cancelamento (threading.Event) for acionado, a varredura para no próximo arquivo.
+# Enquanto o total ainda não é conhecido (gerador), o progresso é informado com total 0.
+#
+# Arquivos ignorados ou com erro (ArquivoIgnorado) não são devolvidos: são avisados pelo
+# ignorado_callback(arquivo, erro). Um arquivo que passa do tempo limite ou derruba o processo
+# que o lia derruba o pool inteiro; cada processo informa o arquivo que está lendo, e só esse
+# arquivo (ou, numa queda sem culpado conhecido, os que estavam em leitura) fica de fora ou é
+# refeito um por vez. Os demais arquivos dos lotes perdidos voltam a um pool novo, em paralelo. Sem o tempo limite, as varreduras pequenas são
+# lidas no próprio processo. Com uma quarentena (Quarentena), os arquivos que deram erro
+# permanente são guardados nela, e os que já estão nela são pulados sem abrir até serem
+# modificados.
+def varrer_em_paralelo(pasta, arquivos, funcao, argumentos=(), num_processos=NUM_PROCESSOS_PADRAO,
+                       tamanho_lote=TAMANHO_LOTE_PADRAO, progress_callback=None, cancelamento=None,
+                       ignorado_callback=None, tempo_limite=TEMPO_LIMITE_PADRAO, quarentena=None):
+    num_processos = num_processos or os.cpu_count() or 1
+    total_arquivos = len(arquivos) if hasattr(arquivos, "__len__") else 0
+    processados = 0
+    em_quarentena = 0
+
+    def avisar_progresso(total):
+        if progress_callback:
+            progress_callback(processados, total)
+
+    if quarentena is not None:
+        # Os arquivos em quarentena contam no progresso, mas não são lidos
+        def fora_da_quarentena():
+            nonlocal processados, em_quarentena
+            for arquivo in arquivos:
+                registro = quarentena.consultar(os.path.join(pasta, arquivo))
+                if registro is None:
+                    yield arquivo
+                    continue
+                tipo, motivo = registro
+                avisar_ignorado(pasta, arquivo, EmQuarentena(f"{tipo}: {motivo}"), ignorado_callback)
+                em_quarentena += 1
+                processados += 1
+                avisar_progresso(total_arquivos)
+        lotes = dividir_em_lotes(fora_da_quarentena(), tamanho_lote)
+    else:
+        lotes = dividir_em_lotes(arquivos, tamanho_lote)
+
+    try:
+        primeiro_lote = next(lotes, [])
+        segundo_lote = next(lotes, [])
+
+        # Sem tempo limite, poucos arquivos (ou um processo só) são lidos no próprio processo
+        if not tempo_limite and (not segundo_lote or num_processos == 1):
+            for arquivo in chain(primeiro_lote, segundo_lote, chain.from_iterable(lotes)):
+                if cancelamento and cancelamento.is_set():
+                    return
+                resultado = processar_arquivo(funcao, pasta, arquivo, argumentos)
+                processados += 1
+                if isinstance(resultado, ArquivoIgnorado):
+                    avisar_ignorado(pasta, arquivo, resultado, ignorado_callback, quarentena)
+                else:
+                    yield arquivo, resultado
+                avisar_progresso(total_arquivos)
+            return
+
+        perfil_principal = perfil.perfil_atual
+        enviados = 0
+        listagem_terminada = False
+
+        # Conta os arquivos à medida que os lotes são enviados; terminada a listagem, o total
+        # passa a ser conhecido
+        def contar_lotes():
+            nonlocal enviados, listagem_terminada
+            for lote in chain([primeiro_lote, segundo_lote], lotes):
+                enviados += len(lote)
+                yield lote
+            listagem_terminada = True
+
+        if segundo_lote:
+            resultados_lotes = varrer_lotes_em_processos(
+                pasta, contar_lotes(), funcao, argumentos, num_processos, tempo_limite,
+                perfil_principal is not None, cancelamento
+            )
+        else:
+            # Para poucos arquivos, criar os processos custa mais do que a própria busca: eles
+            # são lidos um por vez no processo reserva, que fica aberto entre as varreduras
+            resultados_lotes = ler_um_por_vez(
+                pasta, chain.from_iterable(contar_lotes()), funcao, argumentos, tempo_limite,
+                perfil_principal is not None, cancelamento
+            )
+        for resultados, dados_perfil in resultados_lotes:
+            if dados_perfil and perfil_principal:
+                perfil_principal.mesclar(dados_perfil)
+            total = total_arquivos or (enviados + em_quarentena if listagem_terminada else 0)
+            for arquivo, resultado in resultados:
+                processados += 1
+                if isinstance(resultado, ArquivoIgnorado):
+                    avisar_ignorado(pasta, arquivo, resultado, ignorado_callback, quarentena)
+                else:
+                    yield arquivo, resultado
+                avisar_progresso(total)
+    finally:
+        if quarentena is not None:
+            quarentena.salvar()
+
+# Função que distribui os lotes entre os processos e devolve (resultados, dados do perfil)
+# de cada lote terminado
+def varrer_lotes_em_processos(pasta, lotes, funcao, argumentos, num_processos, tempo_limite, com_perfil,
+                              cancelamento):
+    # Importado só aqui: o pool de processos é a parte mais pesada de carregar e só
+    # é necessário quando a varredura é de fato paralela
+    from concurrent.futures import FIRST_COMPLETED, wait
+    from concurrent.futures.process import BrokenProcessPool
+    leituras, vagas = criar_leituras(num_processos)
+    executor = criar_executor(num_processos, tempo_limite, leituras, vagas)
+    em_andamento = {}  # Futuro -> (número do lote, lote, já reenviado)
+    reenviar = deque()  # Lotes perdidos com a queda de um processo, com os arquivos inocentes
+    numeros_lotes = count()
+    listagem_terminada = False
+
+    # Mantém alguns lotes na fila de cada processo; os próximos só são lidos (e a listagem
+    # só avança) quando um lote termina, para não acumular a pasta inteira na memória. Os
+    # lotes a reenviar passam na frente.
+    def enviar_lotes():
+        nonlocal listagem_terminada
+        while len(em_andamento) < num_processos * LOTES_POR_PROCESSO:
+            if reenviar:
+                lote, reenviado = reenviar.popleft(), True
+            elif listagem_terminada:
+                return
+            else:
+                lote, reenviado = next(lotes, None), False
+                if lote is None:
+                    listagem_terminada = True
+                    return
+            numero = next(numeros_lotes)
+            futuro = executor.submit(processar_lote, funcao, pasta, lote, argumentos, com_perfil, numero)
+            em_andamento[futuro] = (numero, lote, reenviado)
+
+    try:
+        enviar_lotes()
+        while em_andamento:
+            prontos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+            perdidos = []
+            for futuro in prontos:
+                lote = em_andamento.pop(futuro)
+                if cancelamento and cancelamento.is_set():
+                    return
+                try:
+                    yield futuro.result()
+                except BrokenProcessPool:
+                    perdidos.append(lote)
+
+            if perdidos:
+                # Um processo morreu (tempo limite ou falha) e derrubou o pool: todos os lotes
+                # em andamento se perdem. Só os arquivos que os processos liam no momento são
+                # suspeitos; os demais voltam para um pool novo, em paralelo.
+                perdidos.extend(em_andamento.values())
+                em_andamento.clear()
+                executor.shutdown(wait=False, cancel_futures=True)
+                esgotados, suspeitos = separar_suspeitos(leituras, perdidos, reenviar)
+                for arquivo in esgotados:
+                    erro = TempoEsgotado(f"a leitura passou de {tempo_limite} s")
+                    perfil.registrar_falha(arquivo, erro)
+                    yield [(arquivo, erro)], None
+                yield from ler_um_por_vez(pasta, suspeitos, funcao, argumentos, tempo_limite, com_perfil,
+                                          cancelamento)
+                leituras, vagas = criar_leituras(num_processos)
+                executor = criar_executor(num_processos, tempo_limite, leituras, vagas)
+
+            enviar_lotes()
+    finally:
+        # Se a varredura for interrompida, os lotes que ainda não começaram são descartados
+        # e os que estão em andamento terminam em segundo plano, sem segurar quem chamou
+        executor.shutdown(wait=not em_andamento, cancel_futures=True)
+
+# Função para separar os arquivos dos lotes perdidos (número, lote, já reenviado) pelo que
+# cada processo lia quando o pool caiu. Os que a vigia encerrou por tempo são os culpados, e
+# os outros arquivos em leitura eram inocentes; sem culpado conhecido (o processo caiu por
+# outro motivo), os arquivos em leitura são suspeitos, lidos depois um por vez. Os demais
+# voltam para reenviar, em lotes; um lote perdido pela segunda vez sem arquivo em leitura
+# (o processo caiu entre os arquivos) fica todo entre os suspeitos.
+# Retorna (arquivos que passaram do tempo limite, suspeitos).
+def separar_suspeitos(leituras, perdidos, reenviar):
+    em_leitura = {}  # (número do lote, posição) -> situação
+    for inicio in range(0, len(leituras), 3):
+        numero, posicao, situacao = leituras[inicio:inicio + 3]
+        if numero >= 0:
+            em_leitura[numero, posicao] = situacao
+    tem_culpado = LEITURA_ESGOTADA in em_leitura.values()
+
+    esgotados, suspeitos = [], []
+    for numero, lote, reenviado in perdidos:
+        inocentes = []
+        for posicao, arquivo in enumerate(lote):
+            situacao = em_leitura.get((numero, posicao))
+            if situacao == LEITURA_ESGOTADA:
+                esgotados.append(arquivo)
+            elif situacao == LENDO and not tem_culpado:
+                suspeitos.append(arquivo)
+            else:
+                inocentes.append(arquivo)
+        if reenviado and len(inocentes) == len(lote) and not tem_culpado:
+            suspeitos.extend(inocentes)
+        elif inocentes:
+            reenviar.append(inocentes)
+    return esgotados, suspeitos
+
+# Função para criar a memória compartilhada em que cada processo do pool informa o arquivo
+# que está lendo (três números por processo: lote, posição e situação) e o contador de vagas
+def criar_leituras(num_processos):
+    import multiprocessing
+    leituras = multiprocessing.Array("q", [-1] * (3 * num_processos), lock=False)
+    return leituras, multiprocessing.Value("i", 0)
+
+# Função para criar o pool de processos da varredura
+def criar_executor(num_processos, tempo_limite, leituras=None, vagas=None):
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=num_processos, initializer=iniciar_processo,
+                               initargs=(tempo_limite, leituras, vagas))
+
+# Função para obter o processo reserva: um pool de um processo só, mantido entre as
+# varreduras para que as pequenas não paguem a criação de um processo a cada busca. Um novo
+# é criado quando o tempo limite muda ou quando o pool informado em descartar (encerrado
+# pela vigia, por exemplo) ainda é o atual.
+def processo_reserva(tempo_limite, descartar=None):
+    global reserva
+    with trava_reserva:
+        if reserva is not None and (reserva[0] is descartar or reserva[1] != tempo_limite):
+            reserva[0].shutdown(wait=False, cancel_futures=True)
+            reserva = None
+        if reserva is None:
+            reserva = (criar_executor(1, tempo_limite), tempo_limite)
+        return reserva[0]
+
+# Função para enviar um arquivo ao processo reserva; se ele morreu (ou foi descartado) desde
+# a última leitura, o arquivo vai para um novo
+def enviar_ao_processo_reserva(tempo_limite, *argumentos_lote):
+    from concurrent.futures.process import BrokenProcessPool
+    executor = processo_reserva(tempo_limite)
+    try:
+        return executor, executor.submit(processar_lote, *argumentos_lote)
+    except (BrokenProcessPool, RuntimeError):
+        executor = processo_reserva(tempo_limite, descartar=executor)
+        return executor, executor.submit(processar_lote, *argumentos_lote)
+
+# Função para ler os arquivos um por vez no processo reserva, com o tempo limite: usada nas
+# varreduras pequenas e para refazer os lotes perdidos quando um processo morre (se o processo
+# morrer de novo, o arquivo que estava sendo lido é o responsável). O cancelamento é conferido
+# enquanto cada arquivo é lido; a leitura interrompida continua no processo descartado até
+# terminar ou até a vigia do tempo limite encerrá-lo.
+def ler_um_por_vez(pasta, arquivos, funcao, argumentos, tempo_limite, com_perfil, cancelamento):
+    from concurrent.futures import CancelledError, TimeoutError as EsperaEsgotada
+    from concurrent.futures.process import BrokenProcessPool
+    for arquivo in arquivos:
+        resultado = None
+        while resultado is None:
+            if cancelamento and cancelamento.is_set():
+                return
+            executor, futuro = enviar_ao_processo_reserva(
+                tempo_limite, funcao, pasta, [arquivo], argumentos, com_perfil
+            )
+            inicio = time.monotonic()
+            try:
+                while resultado is None:
+                    try:
+                        resultado = futuro.result(timeout=INTERVALO_CANCELAMENTO)
+                    except EsperaEsgotada:
+                        if cancelamento and cancelamento.is_set():
+                            processo_reserva(tempo_limite, descartar=executor)
+                            return
+            except CancelledError:
+                continue  # Descartado por outra varredura antes de começar: vai para um novo
+            except BrokenProcessPool:
+                processo_reserva(tempo_limite, descartar=executor)
+                if tempo_limite and time.monotonic() - inicio >= tempo_limite:
+                    erro = TempoEsgotado(f"a leitura passou de {tempo_limite} s")
+                else:
+                    erro = FalhaProcesso("o processo que lia o arquivo foi encerrado")
+                perfil.registrar_falha(arquivo, erro)
+                resultado = [(arquivo, erro)], None
+        yield resultado